@@ -1,5 +1,5 @@
-from pyghelper.animation_manager import Animation, AnimationManager
-from pyghelper.event_manager import EventManager
-from pyghelper.images import Image, Sprite
-from pyghelper.sound_manager import SoundManager
-from pyghelper.utils import Window, Scale
+from pyghelper.animation_manager import Animation, AnimationInstance, AnimationManager, AnimationTemplate
+from pyghelper.event_manager import EventManager, EventReplay
+from pyghelper.images import AtlasRegion, DiskImageCache, Image, ImageCache, ImagePreloader, Sprite, TextureAtlas
+from pyghelper.sound_manager import MusicPlaylist, SoundManager
+from pyghelper.utils import DirtyRectTracker, Window, Scale
@@ -1,18 +1,122 @@
-from typing import Union
+import bisect
+import itertools
+from typing import Callable, Union
 
 import pygame
 
+import pyghelper.images as images
 import pyghelper.utils as utils
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-class Animation:
+
+def _correct_durations(durations: Union[int, list[int]], sprites_count: int) -> list[int]:
+    if type(durations) == int:
+        return [durations for _ in range(sprites_count)]
+
+    if len(durations) < sprites_count:
+        missing_count = sprites_count - len(durations)
+        durations.extend([durations[-1]] * missing_count)
+
+    elif len(durations) > sprites_count:
+        durations = durations[:sprites_count]
+
+    return durations
+
+
+class _AnimationState:
+    """
+    Base class holding the playing state (clock and current sprite) of an animation.
+    The subclasses should provide the sprites and the timeline.
+    """
+
+    __slots__ = ('clock', 'current_sprite_index', 'on_frame_change', 'on_loop')
+
+    def __init__(self, starting_sprite_index: int):
+        self.clock: int = 0
+        self.current_sprite_index: int = starting_sprite_index
+        self.on_frame_change: Callable[[int], None] = None
+        self.on_loop: Callable[[], None] = None
+
+    def set_frame_change_callback(self, callback: Callable[[int], None]) -> None:
+        """
+        Set the function called when the current sprite of the animation changes.
+
+        Parameters
+        ----------
+        callback : Callable
+            Function to be called when the sprite changes.
+            It should have only one parameter : the index of the new sprite.
+            None removes the callback.
+        """
+
+        if callback is not None and not callable(callback):
+            raise TypeError("The callback argument is not callable.")
+
+        self.on_frame_change = callback
+
+    def set_loop_callback(self, callback: Callable[[], None]) -> None:
+        """
+        Set the function called when the animation loops back to its beginning.
+
+        Parameters
+        ----------
+        callback : Callable
+            Function to be called when the animation loops.
+            It should not have any parameters.
+            None removes the callback.
+        """
+
+        if callback is not None and not callable(callback):
+            raise TypeError("The callback argument is not callable.")
+
+        self.on_loop = callback
+
+    def __get_current_sprite_index(self) -> int:
+        # First sprite whose cumulated duration reaches the clock
+        return bisect.bisect_left(self.cumulated_durations, self.clock)
+
+    def play(self, ticks: int = 1) -> bool:
+        """Play the specified number of ticks of the animation.
+        Returns True if the current sprite changed, False otherwise.
+
+        Parameters
+        ----------
+        ticks : int, default = 1
+            Number of ticks to play.
+        """
+
+        previous_sprite_index = self.current_sprite_index
+        loops_count, self.clock = divmod(self.clock + ticks, self.animation_duration)
+        self.current_sprite_index = sprite_index = self.__get_current_sprite_index()
+
+        if loops_count > 0 and self.on_loop is not None:
+            self.on_loop()
+
+        if sprite_index == previous_sprite_index:
+            return False
+
+        if self.on_frame_change is not None:
+            self.on_frame_change(sprite_index)
+        return True
+
+    def get_current_sprite(self) -> Union[pygame.Surface, images.AtlasRegion]:
+        """Returns the current sprite of the animation."""
+
+        return self.sprites[self.current_sprite_index]
+
+
+class Animation(_AnimationState):
     """
     A class which manage the working of an animation.
     """
 
     def __init__(
         self,
-        sprites: list[pygame.Surface],
+        sprites: list[Union[pygame.Surface, images.AtlasRegion]],
         durations: Union[int, list[int]],
         starting_sprite_index: int = 0
     ):
@@ -21,8 +125,9 @@ class Animation:
 
         Parameters
         ----------
-        sprites : list of pygame.Surfaces.
-            Can be obtained from a file name using the Image class static methods.
+        sprites : list of pygame.Surfaces or AtlasRegions.
+            Can be obtained from a file name using the Image class static methods,
+            or from a TextureAtlas.
         durations : int or list of int
             Indicates the time to spend on each sprite.
             If an int is passed, it will be used for every sprite.
@@ -32,50 +137,276 @@ class Animation:
             The index of the first sprite of the animation.
         """
 
+        super().__init__(starting_sprite_index)
         self.sprites = sprites
         self.sprites_count = len(self.sprites)
-        self.durations = self.__correct_durations(durations, self.sprites_count)
-        self.clock: int = 0
-        self.current_sprite_index: int = starting_sprite_index
-        self.cumulated_durations: list[int] = [sum(self.durations[:i]) for i in range(1, self.sprites_count + 1)]
+        self.durations = _correct_durations(durations, self.sprites_count)
+        self.cumulated_durations: list[int] = list(itertools.accumulate(self.durations))
         self.animation_duration: int = self.cumulated_durations[-1] # The last cumulated sum is the total sum
 
-    def __correct_durations(self, durations: Union[int, list[int]], sprites_count: int) -> list[int]:
-        if type(durations) == int:
-            return [durations for _ in range(sprites_count)]
 
-        if len(durations) < sprites_count:
-            missing_count = sprites_count - len(durations)
-            durations.extend([durations[-1]] * missing_count)
+class AnimationTemplate:
+    """
+    A class holding the sprites and the timeline of an animation, to be shared
+    by many lightweight AnimationInstance objects.
+    """
 
-        elif len(durations) > sprites_count:
-            durations = durations[:sprites_count]
+    def __init__(
+        self,
+        sprites: list[Union[pygame.Surface, images.AtlasRegion]],
+        durations: Union[int, list[int]]
+    ):
+        """
+        Initialize the template with the specified sprites and durations.
 
-        return durations
+        Parameters
+        ----------
+        sprites : list of pygame.Surfaces or AtlasRegions.
+            Can be obtained from a file name using the Image class static methods,
+            or from a TextureAtlas.
+        durations : int or list of int
+            Indicates the time to spend on each sprite (see Animation).
+        """
 
-    def __get_current_sprite_index(self) -> int:
-        return next(
-            index
-            for index, sprite_start_time in enumerate(self.cumulated_durations)
-            if sprite_start_time >= self.clock
-        )
+        self.sprites: tuple[Union[pygame.Surface, images.AtlasRegion], ...] = tuple(sprites)
+        self.sprites_count = len(self.sprites)
+        self.durations: tuple[int, ...] = tuple(_correct_durations(durations, self.sprites_count))
+        self.cumulated_durations: tuple[int, ...] = tuple(itertools.accumulate(self.durations))
+        self.animation_duration: int = self.cumulated_durations[-1]
 
-    def play(self, ticks: int = 1) -> None:
-        """Play the specified number of ticks of the animation.
+    def instantiate(self, starting_sprite_index: int = 0) -> 'AnimationInstance':
+        """
+        Return a new instance playing this template.
 
         Parameters
         ----------
-        ticks : int, default = 1
-            Number of ticks to play.
+        starting_sprite_index : int, default = 0
+            The index of the first sprite of the animation.
         """
 
-        self.clock = (self.clock + ticks) % self.animation_duration
-        self.current_sprite_index = self.__get_current_sprite_index()
+        return AnimationInstance(self, starting_sprite_index)
 
-    def get_current_sprite(self) -> pygame.Surface:
-        """Returns the current sprite of the animation."""
 
-        return self.sprites[self.current_sprite_index]
+class AnimationInstance(_AnimationState):
+    """
+    A lightweight animation which only stores its own state,
+    the sprites and the timeline being read from its AnimationTemplate.
+    """
+
+    __slots__ = ('template',)
+
+    def __init__(self, template: AnimationTemplate, starting_sprite_index: int = 0):
+        """
+        Initialize the instance with the specified template.
+
+        Parameters
+        ----------
+        template : AnimationTemplate
+            Template containing the sprites and the durations.
+        starting_sprite_index : int, default = 0
+            The index of the first sprite of the animation.
+        """
+
+        super().__init__(starting_sprite_index)
+        self.template = template
+
+    @property
+    def sprites(self) -> tuple[Union[pygame.Surface, images.AtlasRegion], ...]:
+        return self.template.sprites
+
+    @property
+    def sprites_count(self) -> int:
+        return self.template.sprites_count
+
+    @property
+    def durations(self) -> tuple[int, ...]:
+        return self.template.durations
+
+    @property
+    def cumulated_durations(self) -> tuple[int, ...]:
+        return self.template.cumulated_durations
+
+    @property
+    def animation_duration(self) -> int:
+        return self.template.animation_duration
+
+
+class _AnimationBatch:
+    """
+    Store the clocks and timelines of several animations in contiguous NumPy arrays,
+    so they can all be played with a few vectorized operations.
+    The arrays have spare capacity, so that animations can be added and removed every frame.
+    """
+
+    SLOT_ARRAYS = ('clocks', 'sprite_indices', 'animation_durations', 'timeline_offsets', 'timeline_starts')
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.names: list[str] = list()
+        self.animations: list[_AnimationState] = list()
+        self.slots: dict[str, int] = dict()
+        self.clocks = np.empty(capacity, dtype=np.int64)
+        self.sprite_indices = np.empty(capacity, dtype=np.int64)
+        self.animation_durations = np.empty(capacity, dtype=np.int64)
+        self.timeline_offsets = np.empty(capacity, dtype=np.int64)
+        self.timeline_starts = np.empty(capacity, dtype=np.int64)
+
+        # All the cumulated durations are stored into a single sorted timeline. Each timeline is shifted
+        # by the total duration of the previous ones (plus one, so that a clock of 0 never matches the last
+        # sprite of the previous timeline). The instances of the same template share the same timeline.
+        self.timeline = np.empty(4 * capacity, dtype=np.int64)
+        self.timeline_length = 0
+        self.__timeline_end = 0
+        self.__live_timeline_length = 0
+        # Timeline key -> [offset, start, users count, cumulated durations]
+        self.__segments: dict[int, list] = dict()
+        self.__slot_keys: list[int] = list()
+        # Slots whose animation may have been modified outside of the batch
+        self.__dirty_slots: set[int] = set()
+
+    @staticmethod
+    def __grow(array: 'np.ndarray', capacity: int) -> 'np.ndarray':
+        grown_array = np.empty(capacity, dtype=array.dtype)
+        grown_array[:len(array)] = array
+        return grown_array
+
+    def __append_timeline(self, cumulated_durations: 'np.ndarray') -> int:
+        start = self.timeline_length
+        end = start + len(cumulated_durations)
+        if end > len(self.timeline):
+            self.timeline = _AnimationBatch.__grow(self.timeline, max(2 * len(self.timeline), end))
+        self.timeline[start:end] = cumulated_durations
+        self.timeline_length = end
+        return start
+
+    def __acquire_segment(self, animation: _AnimationState) -> list:
+        key = id(animation.cumulated_durations)
+        segment = self.__segments.get(key, None)
+        if segment is None:
+            offset = self.__timeline_end
+            start = self.__append_timeline(np.asarray(animation.cumulated_durations, dtype=np.int64) + offset)
+            segment = [offset, start, 0, animation.cumulated_durations]
+            self.__segments[key] = segment
+            self.__timeline_end += animation.animation_duration + 1
+            self.__live_timeline_length += animation.sprites_count
+
+        segment[2] += 1
+        return segment
+
+    def __release_segment(self, key: int) -> None:
+        segment = self.__segments[key]
+        segment[2] -= 1
+        if segment[2] > 0:
+            return
+
+        del self.__segments[key]
+        self.__live_timeline_length -= len(segment[3])
+        dead_length = self.timeline_length - self.__live_timeline_length
+        if dead_length > max(self.__live_timeline_length, 1024):
+            self.__compact_timeline()
+
+    def __compact_timeline(self) -> None:
+        # The timelines of the removed animations are only dropped from time to time
+        self.timeline_length = 0
+        self.__timeline_end = 0
+        for segment in self.__segments.values():
+            segment[0] = self.__timeline_end
+            segment[1] = self.__append_timeline(np.asarray(segment[3], dtype=np.int64) + self.__timeline_end)
+            self.__timeline_end += segment[3][-1] + 1
+
+        for slot, key in enumerate(self.__slot_keys):
+            self.timeline_offsets[slot], self.timeline_starts[slot] = self.__segments[key][:2]
+
+    def add(self, name: str, animation: _AnimationState) -> None:
+        if self.count == len(self.clocks):
+            for array_name in _AnimationBatch.SLOT_ARRAYS:
+                setattr(self, array_name, _AnimationBatch.__grow(getattr(self, array_name), 2 * self.count))
+
+        slot = self.count
+        segment = self.__acquire_segment(animation)
+        self.clocks[slot] = animation.clock
+        self.sprite_indices[slot] = animation.current_sprite_index
+        self.animation_durations[slot] = animation.animation_duration
+        self.timeline_offsets[slot], self.timeline_starts[slot] = segment[:2]
+
+        self.names.append(name)
+        self.animations.append(animation)
+        self.__slot_keys.append(id(animation.cumulated_durations))
+        self.slots[name] = slot
+        self.count += 1
+
+    def remove(self, name: str) -> None:
+        self.sync(name)
+        slot = self.slots.pop(name)
+        self.__release_segment(self.__slot_keys[slot])
+        self.__dirty_slots.discard(slot)
+
+        # The last animation takes the place of the removed one
+        last_slot = self.count - 1
+        if slot != last_slot:
+            for array_name in _AnimationBatch.SLOT_ARRAYS:
+                array = getattr(self, array_name)
+                array[slot] = array[last_slot]
+            self.names[slot] = self.names[last_slot]
+            self.animations[slot] = self.animations[last_slot]
+            self.__slot_keys[slot] = self.__slot_keys[last_slot]
+            self.slots[self.names[slot]] = slot
+            if last_slot in self.__dirty_slots:
+                self.__dirty_slots.discard(last_slot)
+                self.__dirty_slots.add(slot)
+
+        self.names.pop()
+        self.animations.pop()
+        self.__slot_keys.pop()
+        self.count -= 1
+
+    def sync(self, name: str) -> None:
+        # Copy the state of the arrays into the animation, which may then be modified by the caller
+        slot = self.slots[name]
+        if slot in self.__dirty_slots:
+            # The animation already holds the latest state
+            return
+
+        animation = self.animations[slot]
+        animation.clock = int(self.clocks[slot])
+        animation.current_sprite_index = int(self.sprite_indices[slot])
+        self.__dirty_slots.add(slot)
+
+    def play(self, ticks: int) -> set[str]:
+        for slot in self.__dirty_slots:
+            self.clocks[slot] = self.animations[slot].clock
+            self.sprite_indices[slot] = self.animations[slot].current_sprite_index
+        self.__dirty_slots.clear()
+
+        count = self.count
+        clocks = self.clocks[:count]
+        sprite_indices = self.sprite_indices[:count]
+        animation_durations = self.animation_durations[:count]
+
+        previous_sprite_indices = sprite_indices.copy()
+        np.add(clocks, ticks, out=clocks)
+        looped = clocks >= animation_durations
+        np.remainder(clocks, animation_durations, out=clocks)
+        queries = clocks + self.timeline_offsets[:count]
+        np.subtract(
+            np.searchsorted(self.timeline[:self.timeline_length], queries),
+            self.timeline_starts[:count],
+            out=sprite_indices
+        )
+
+        for slot in np.flatnonzero(looped).tolist():
+            animation = self.animations[slot]
+            if animation.on_loop is not None:
+                animation.on_loop()
+
+        changed_slots = np.flatnonzero(sprite_indices != previous_sprite_indices).tolist()
+        for slot, sprite_index in zip(changed_slots, sprite_indices[changed_slots].tolist()):
+            animation = self.animations[slot]
+            animation.current_sprite_index = sprite_index
+            if animation.on_frame_change is not None:
+                animation.on_frame_change(sprite_index)
+
+        return {self.names[slot] for slot in changed_slots}
 
 
 class AnimationManager:
@@ -83,12 +414,28 @@ class AnimationManager:
     A class to manages multiple Animation classes simultaneously.
     """
 
-    def __init__(self):
-        """Initialize the manager."""
+    def __init__(self, batch: bool = False):
+        """
+        Initialize the manager.
 
-        self.animations: dict[str, Animation] = dict()
+        Parameters
+        ----------
+        batch : bool, default = False
+            If True, the clocks and timelines of all the animations are kept in NumPy arrays
+            and played together with vectorized operations. Useful with thousands of animations.
+            Requires NumPy. The current sprite index of the animations is always up to date, but their clock
+            is only copied back when they are accessed through the manager (get_animation or square brackets)
+            or removed from it. Changes made to an animation after such an access are taken into account.
+        """
 
-    def add_animation(self, animation: Animation, name: str) -> None:
+        if batch and np is None:
+            raise ImportError("NumPy is required to use the batch mode of the AnimationManager.")
+
+        self.animations: dict[str, Union[Animation, AnimationInstance]] = dict()
+        self.batch = batch
+        self.__batch: _AnimationBatch = _AnimationBatch() if batch else None
+
+    def add_animation(self, animation: Union[Animation, AnimationInstance], name: str) -> None:
         """
         Add the specified animation to the manager.
 
@@ -100,15 +447,19 @@ class AnimationManager:
             Name of the animation.
         """
 
-        if type(animation) != Animation:
-            raise TypeError("The animation should be of type Animation.")
+        if not isinstance(animation, (Animation, AnimationInstance)):
+            raise TypeError("The animation should be of type Animation or AnimationInstance.")
 
         if name == "":
             raise ValueError("Animation name cannot be empty.")
 
+        if self.__batch is not None:
+            if name in self.animations:
+                self.__batch.remove(name)
+            self.__batch.add(name, animation)
         self.animations[name] = animation
 
-    def remove_animation(self, name: str) -> Animation:
+    def remove_animation(self, name: str) -> Union[Animation, AnimationInstance]:
         """
         Remove and return the specified animation from the manager.
 
@@ -121,15 +472,19 @@ class AnimationManager:
         if name not in self.animations:
             raise ValueError(f"This animation ('{name}') does not exist.")
 
+        if self.__batch is not None:
+            self.__batch.remove(name)
         return self.animations.pop(name)
 
-    def __getitem__(self, name: str) -> Animation:
+    def __getitem__(self, name: str) -> Union[Animation, AnimationInstance]:
         if name not in self.animations:
             raise IndexError(f"This animation ('{name}') does not exist.")
 
+        if self.__batch is not None:
+            self.__batch.sync(name)
         return self.animations[name]
 
-    def get_animation(self, name: str) -> Animation:
+    def get_animation(self, name: str) -> Union[Animation, AnimationInstance]:
         """
         Return the animation at the specified index. Can be accessed with square brackets.
 
@@ -141,7 +496,7 @@ class AnimationManager:
 
         return self[name]
 
-    def get_current_sprite(self, name: str) -> pygame.Surface:
+    def get_current_sprite(self, name: str) -> Union[pygame.Surface, images.AtlasRegion]:
         """
         Return the sprite of the specified animation.
 
@@ -151,11 +506,16 @@ class AnimationManager:
             Name of the animation to get the sprite of.
         """
 
-        return self[name].get_current_sprite()
+        if name not in self.animations:
+            raise IndexError(f"This animation ('{name}') does not exist.")
+
+        # The current sprite index is always up to date, even in batch mode
+        return self.animations[name].get_current_sprite()
 
-    def play_all(self, ticks: int = 1) -> None:
+    def play_all(self, ticks: int = 1) -> set[str]:
         """
         Play the specified number of ticks of all the animations.
+        Returns the names of the animations whose current sprite changed.
 
         Parameters
         ----------
@@ -163,5 +523,7 @@ class AnimationManager:
             Number of ticks to play.
         """
 
-        for animation in self.animations.values():
-            animation.play(ticks)
+        if self.__batch is not None:
+            return self.__batch.play(ticks)
+
+        return {name for name, animation in self.animations.items() if animation.play(ticks)}
@@ -1,3 +1,3 @@
 import pygame
 
-MUSICENDEVENT = pygame.USEREVENT + 1
+MUSICENDEVENT = pygame.event.custom_type()
@@ -1,5 +1,12 @@
+import asyncio
+import bisect
+import concurrent.futures
 import inspect
-from typing import Callable
+import marshal
+import struct
+import threading
+import time
+from typing import Any, Callable, Optional
 
 import pygame
 
@@ -7,11 +14,291 @@ import pyghelper.config as config
 import pyghelper.utils as utils
 
 
+class EventInstrumentation:
+    """
+    A class gathering timing statistics of the callbacks of an EventManager
+    (see EventManager.enable_instrumentation).
+    """
+
+    # Upper bounds (in milliseconds) of the buckets of the latency histograms
+    LATENCY_BUCKETS = (0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 33.0, 66.0, float('inf'))
+
+    def __init__(self, budget: Optional[float], on_budget_exceeded: Optional[Callable[[float], None]]):
+        self.budget = budget
+        self.on_budget_exceeded = on_budget_exceeded
+        # Callback -> [calls count, cumulated time in seconds]
+        self.callbacks: dict[Callable, list] = dict()
+        # Event type -> count of events in each latency bucket
+        self.latencies: dict[int, list[int]] = dict()
+        self.listen_calls = 0
+        self.budget_exceeded_count = 0
+        self.__listen_start = 0.0
+
+    def make_handler(self, event_type: int, registrations: list[tuple]) -> Callable[[dict], None]:
+        handlers = tuple((self.callbacks.setdefault(registration[2], [0, 0.0]), registration[3])
+                         for registration in registrations)
+        latencies = self.latencies.setdefault(event_type, [0] * len(EventInstrumentation.LATENCY_BUCKETS))
+
+        def instrumented_handler(data: dict) -> None:
+            start = time.perf_counter()
+            # Events posted with a 'timestamp' (in pygame ticks) are measured from it,
+            # the others from the moment they were fetched
+            if 'timestamp' in data:
+                latency = pygame.time.get_ticks() - data['timestamp']
+            else:
+                latency = (start - self.__listen_start) * 1000
+            latencies[bisect.bisect_left(EventInstrumentation.LATENCY_BUCKETS, latency)] += 1
+
+            for stats, handler in handlers:
+                handler_start = time.perf_counter()
+                handler(data)
+                stats[0] += 1
+                stats[1] += time.perf_counter() - handler_start
+
+        return instrumented_handler
+
+    def start_listen(self) -> None:
+        self.__listen_start = time.perf_counter()
+
+    def end_listen(self) -> None:
+        self.listen_calls += 1
+        duration = (time.perf_counter() - self.__listen_start) * 1000
+        if self.budget is not None and duration > self.budget:
+            self.budget_exceeded_count += 1
+            if self.on_budget_exceeded is not None:
+                self.on_budget_exceeded(duration)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Returns the number of calls and cumulated time (in milliseconds) of each callback,
+        the latency histogram of each event type, and the number of listen calls over budget."""
+
+        return {
+            'callbacks': {
+                callback: {'calls': calls, 'time': total_time * 1000}
+                for callback, (calls, total_time) in self.callbacks.items()
+            },
+            'latency_buckets': EventInstrumentation.LATENCY_BUCKETS,
+            'latencies': {event_type: list(counts) for event_type, counts in self.latencies.items()},
+            'listen_calls': self.listen_calls,
+            'budget_exceeded': self.budget_exceeded_count
+        }
+
+
+# Frame index, time since the start of the recording (ms), event type, size of the data
+_RECORD_HEADER = struct.Struct('<IIII')
+_RECORDING_MAGIC = b'PGHEVT02'
+# The data of the events is stored with marshal, restricted to plain values so that loading a log cannot run code
+_MARSHAL_VERSION = 4
+_PLAIN_TYPES = (type(None), bool, int, float, str, bytes)
+
+
+def _is_plain_value(value: Any) -> bool:
+    if type(value) in (tuple, list):
+        return all(_is_plain_value(item) for item in value)
+
+    return type(value) in _PLAIN_TYPES
+
+
+class EventRecorder:
+    """
+    A class writing the events fetched by an EventManager into a compact binary log
+    (see EventManager.start_recording).
+    """
+
+    def __init__(self, file_path: str):
+        self.file = open(file_path, 'wb', buffering=1 << 16)
+        self.file.write(_RECORDING_MAGIC)
+        self.start_time = time.perf_counter()
+        self.frame_index = 0
+
+    @staticmethod
+    def __serialize(data: dict) -> bytes:
+        # Values which are not plain data (e.g. window objects) cannot be replayed, they are dropped
+        return marshal.dumps(
+            {key: value for key, value in data.items() if type(key) == str and _is_plain_value(value)},
+            _MARSHAL_VERSION
+        )
+
+    def record(self, events: list[pygame.event.Event]) -> None:
+        elapsed_time = int((time.perf_counter() - self.start_time) * 1000)
+        for event in events:
+            payload = EventRecorder.__serialize(event.dict)
+            self.file.write(_RECORD_HEADER.pack(self.frame_index, elapsed_time, event.type, len(payload)))
+            self.file.write(payload)
+        self.frame_index += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class EventReplay:
+    """
+    A class feeding the events of a log written by EventManager.start_recording back
+    into an EventManager (see EventManager.set_event_source), without any display.
+    """
+
+    def __init__(self, file_path: str, realtime: bool = False):
+        """
+        Load the specified log.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the log file.
+        realtime : bool, default = False
+            If True, the events are replayed at the speed they were recorded.
+            Otherwise, the events of one recorded frame are replayed at each listen call
+            (frames without events included), as fast as the listen calls happen.
+        """
+
+        self.realtime = realtime
+        # Each frame as (frame index, time in ms, list of (event type, data))
+        self.frames: list[tuple[int, int, list[tuple[int, dict]]]] = list()
+        self.__next_frame = 0
+        self.__frame_index = 0
+        self.__start_time: float = None
+
+        with open(file_path, 'rb') as fi:
+            if fi.read(len(_RECORDING_MAGIC)) != _RECORDING_MAGIC:
+                raise ValueError(f"File '{file_path}' is not an event recording.")
+
+            while True:
+                header = fi.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+
+                frame_index, elapsed_time, event_type, payload_size = _RECORD_HEADER.unpack(header)
+                try:
+                    data = marshal.loads(fi.read(payload_size))
+                except (EOFError, ValueError, TypeError):
+                    data = None
+                if type(data) != dict or not all(type(key) == str and _is_plain_value(value) for key, value in data.items()):
+                    raise ValueError(f"File '{file_path}' is not a valid event recording.")
+
+                if len(self.frames) == 0 or self.frames[-1][0] != frame_index:
+                    self.frames.append((frame_index, elapsed_time, list()))
+                self.frames[-1][2].append((event_type, data))
+
+    @staticmethod
+    def __make_event(event_type: int, data: dict) -> pygame.event.Event:
+        # Custom event types depend on the registration order, so they are found again from their name
+        if event_type > pygame.USEREVENT and 'name' in data:
+            event_type = EventManager.get_custom_event_type(data['name'])
+        return pygame.event.Event(event_type, data)
+
+    def is_done(self) -> bool:
+        """Returns True when every recorded event has been replayed."""
+
+        return self.__next_frame >= len(self.frames)
+
+    def get_events(self) -> list[pygame.event.Event]:
+        """Returns the events of the next frame (or all those which are due, in realtime mode)."""
+
+        if self.realtime:
+            if self.__start_time is None:
+                self.__start_time = time.perf_counter()
+            elapsed_time = (time.perf_counter() - self.__start_time) * 1000
+            last_frame = self.__next_frame
+            while last_frame < len(self.frames) and self.frames[last_frame][1] <= elapsed_time:
+                last_frame += 1
+        else:
+            last_frame = self.__next_frame
+            if last_frame < len(self.frames) and self.frames[last_frame][0] <= self.__frame_index:
+                last_frame += 1
+            self.__frame_index += 1
+
+        events = [
+            EventReplay.__make_event(event_type, data)
+            for _, _, frame_events in self.frames[self.__next_frame:last_frame]
+            for event_type, data in frame_events
+        ]
+        self.__next_frame = last_frame
+        return events
+
+
+class BackgroundJobs:
+    """
+    A class running a callback on a worker pool each time an event occurs, and posting its result
+    back as a custom event (see EventManager.add_background_callback).
+    """
+
+    def __init__(
+        self,
+        callback: Callable,
+        parameters_count: int,
+        result_event_name: str,
+        executor: concurrent.futures.Executor,
+        max_pending: int
+    ):
+        self.callback = callback
+        self.parameters_count = parameters_count
+        self.result_event_name = result_event_name
+        self.executor = executor
+        self.max_pending = max_pending
+        self.running: set[concurrent.futures.Future] = set()
+        self.__waiting_data: Optional[dict] = None
+        self.__cancelled: set[concurrent.futures.Future] = set()
+        self.__lock = threading.Lock()
+
+    def __start(self, data: dict) -> concurrent.futures.Future:
+        if self.parameters_count == 0:
+            future = self.executor.submit(self.callback)
+        else:
+            future = self.executor.submit(self.callback, data)
+        self.running.add(future)
+        return future
+
+    def submit(self, data: dict) -> None:
+        with self.__lock:
+            if len(self.running) >= self.max_pending:
+                # Only the latest event waits for a job to finish, the older ones are stale
+                self.__waiting_data = dict(data)
+                return
+            future = self.__start(dict(data))
+
+        # Outside of the lock, since the callback is called immediately if the job is already done
+        future.add_done_callback(self.__on_done)
+
+    def __on_done(self, future: concurrent.futures.Future) -> None:
+        next_future = None
+        with self.__lock:
+            self.running.discard(future)
+            cancelled = future in self.__cancelled or future.cancelled()
+            self.__cancelled.discard(future)
+            if self.__waiting_data is not None:
+                next_future = self.__start(self.__waiting_data)
+                self.__waiting_data = None
+
+        if next_future is not None:
+            next_future.add_done_callback(self.__on_done)
+
+        if cancelled:
+            return
+
+        if future.exception() is not None:
+            EventManager.post(self.result_event_name, result=None, error=future.exception())
+        else:
+            EventManager.post(self.result_event_name, result=future.result(), error=None)
+
+    def cancel(self) -> None:
+        with self.__lock:
+            self.__waiting_data = None
+            futures = list(self.running)
+            self.__cancelled.update(futures)
+
+        # Cancelling a future calls its done callbacks, which take the lock
+        for future in futures:
+            future.cancel()
+
+
 class EventManager:
     """
     A class to ease the use of premade and custom events of PyGame.
     """
 
+    # Event types are global to Pygame, so the same name gets the same type in every manager
+    __custom_event_types: dict[str, int] = dict()
+
     def __init__(self, use_default_quit_callback: bool = True):
         """
         Initialize the event manager instance. No callback are set at the beginning,
@@ -33,11 +320,29 @@ class EventManager:
             pygame.MOUSEBUTTONUP: None,
             config.MUSICENDEVENT: None
         }
+        self.custom_events = dict()
 
-        if use_default_quit_callback:
-            self.premade_events[pygame.QUIT] = utils.Window.close
+        # Registered callbacks of each event type as (priority, registration order, callback, handler),
+        # and the dispatch table built from them : event type -> tuple of handlers taking the event data
+        self.__callbacks: dict[int, list[tuple[int, int, Callable, Callable[[dict], None]]]] = dict()
+        self.__handlers: dict[int, tuple[Callable[[dict], None], ...]] = dict()
+        self.__registrations_count = 0
+        self.__coalesced_types: set[int] = set()
+        self.__queue_filtering = False
+        self.__fetch_registered_only = False
+        self.__registered_types: tuple[int, ...] = tuple()
+        self.__queue_filter_outdated = False
+        self.__allowed_types: set[int] = None
+        self.__running = False
+        self.__tasks: set[asyncio.Task] = set()
+        self.instrumentation: EventInstrumentation = None
+        self.__recorder: EventRecorder = None
+        self.__executor: concurrent.futures.ThreadPoolExecutor = None
+        self.__background_jobs: list[BackgroundJobs] = list()
+        self.__event_source: EventReplay = None
 
-        self.custom_events = dict()
+        if use_default_quit_callback:
+            self.__set_premade_callback(pygame.QUIT, utils.Window.close, expected_parameters_count=0)
 
 
     def __get_parameters_count(self, function: Callable) -> int :
@@ -53,9 +358,201 @@ class EventManager:
             raise ValueError(f"The callback has {parameters_count} parameters instead of {expected_parameters_count}.")
 
 
+    def __make_handler(self, callback: Callable, parameters_count: int) -> Callable[[dict], None]:
+        # Resolved once here, so the dispatch never has to check the number of parameters
+        if inspect.iscoroutinefunction(callback):
+            if parameters_count == 0:
+                return lambda data: self.__schedule(callback())
+            return lambda data: self.__schedule(callback(data))
+
+        if parameters_count == 0:
+            return lambda data: callback()
+        return callback
+
+
+    def __schedule(self, coroutine) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(coroutine)
+        except RuntimeError:
+            coroutine.close()
+            raise RuntimeError("Asynchronous callbacks can only be used while an asyncio loop is running (see run_async).")
+
+        # A reference is kept so the task is not garbage collected before its end
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+
+    def __rebuild_handlers(self, event_type: int) -> None:
+        callbacks = self.__callbacks.get(event_type, None)
+        if not callbacks:
+            self.__callbacks.pop(event_type, None)
+            self.__handlers.pop(event_type, None)
+        else:
+            callbacks.sort(key=lambda registration: (-registration[0], registration[1]))
+            if self.instrumentation is None:
+                self.__handlers[event_type] = tuple(registration[3] for registration in callbacks)
+            else:
+                self.__handlers[event_type] = (self.instrumentation.make_handler(event_type, callbacks),)
+
+        self.__registered_types = tuple(self.__handlers.keys())
+        self.__synchronize_queue_filter()
+
+
+    def __synchronize_queue_filter(self) -> None:
+        # Applied right away so that the events posted before the next listen are not dropped,
+        # or in the next call to listen if the display is not initialized yet
+        self.__queue_filter_outdated = True
+        if self.__queue_filtering and pygame.display.get_init():
+            self.__update_queue_filter()
+
+
+    def __register(self, event_type: int, callback: Callable, parameters_count: int, priority: int,
+                   handler: Optional[Callable[[dict], None]] = None) -> None:
+        if handler is None:
+            handler = self.__make_handler(callback, parameters_count)
+        self.__callbacks.setdefault(event_type, list()).append((priority, self.__registrations_count, callback, handler))
+        self.__registrations_count += 1
+        self.__rebuild_handlers(event_type)
+
+
+    def __unregister(self, event_type: int, callback: Callable) -> bool:
+        callbacks = self.__callbacks.get(event_type, list())
+        for index, registration in enumerate(callbacks):
+            if registration[2] == callback:
+                callbacks.pop(index)
+                self.__rebuild_handlers(event_type)
+                return True
+
+        return False
+
+
     def __set_premade_callback(self, event_type: int, callback: Callable[[dict], None], expected_parameters_count: int) -> None:
         self.__check_function(callback, expected_parameters_count)
+
+        if self.premade_events[event_type] is not None:
+            self.__unregister(event_type, self.premade_events[event_type])
+
         self.premade_events[event_type] = callback
+        self.__register(event_type, callback, expected_parameters_count, priority=0)
+
+
+    def add_callback(self, event_type: int, callback: Callable[[dict], None], priority: int = 0) -> None:
+        """
+        Add a callback for any type of event (joystick, window, text input, custom types...).
+        Several callbacks can be added for the same type.
+
+        Parameters
+        ----------
+        event_type : int
+            Type of the event, for instance pygame.JOYAXISMOTION.
+        callback : Callable
+            Function to be called when this event occurs.
+            It should have either no parameter, or only one : a dictionary containing the event data.
+            It can be a coroutine function, in which case it is scheduled as a task (see run_async).
+        priority : int, default = 0
+            Callbacks with a higher priority are called first.
+            Those with the same priority are called in the order they were added.
+        """
+
+        if not callable(callback):
+            raise TypeError("The callback argument is not callable.")
+
+        parameters_count = self.__get_parameters_count(callback)
+        if parameters_count > 1:
+            raise ValueError(f"The callback has {parameters_count} parameters instead of 0 or 1.")
+
+        self.__register(event_type, callback, parameters_count, priority)
+
+
+    def add_background_callback(
+        self,
+        event_type: int,
+        callback: Callable[[dict], Any],
+        result_event_name: str,
+        executor: Optional[concurrent.futures.Executor] = None,
+        max_pending: int = 1,
+        priority: int = 0
+    ) -> None:
+        """
+        Add a callback which is run on a worker pool instead of inside listen.
+        Its return value is posted back as the custom event with the specified name,
+        whose data contains the fields 'result' and 'error' (the exception raised, or None).
+
+        Parameters
+        ----------
+        event_type : int
+            Type of the event, for instance pygame.MOUSEBUTTONDOWN.
+        callback : Callable
+            Function to be called on the worker pool when this event occurs.
+            It should have either no parameter, or only one : a dictionary containing the event data.
+        result_event_name : str
+            Name of the custom event posted with the result (see add_custom_event).
+        executor : concurrent.futures.Executor, optional
+            Pool on which to run the callback, for instance a ProcessPoolExecutor
+            (in which case the callback and the event data should be picklable).
+            If not specified, a thread pool shared by the manager is used.
+        max_pending : int, default = 1
+            Maximum number of jobs of this callback running at the same time.
+            When it is reached, only the data of the latest event is kept, and its job is started
+            when a running one finishes : the older events are dropped as stale.
+        priority : int, default = 0
+            Callbacks with a higher priority are called first.
+        """
+
+        if not callable(callback):
+            raise TypeError("The callback argument is not callable.")
+
+        parameters_count = self.__get_parameters_count(callback)
+        if parameters_count > 1:
+            raise ValueError(f"The callback has {parameters_count} parameters instead of 0 or 1.")
+
+        if max_pending <= 0:
+            raise ValueError("The maximum number of pending jobs should be strictly positive.")
+
+        if executor is None:
+            if self.__executor is None:
+                self.__executor = concurrent.futures.ThreadPoolExecutor()
+            executor = self.__executor
+
+        EventManager.get_custom_event_type(result_event_name)
+        background_jobs = BackgroundJobs(callback, parameters_count, result_event_name, executor, max_pending)
+        self.__background_jobs.append(background_jobs)
+        self.__register(event_type, callback, parameters_count, priority, handler=background_jobs.submit)
+
+
+    def cancel_background_jobs(self) -> None:
+        """Cancel every pending job of the background callbacks, their results will not be posted."""
+
+        for background_jobs in self.__background_jobs:
+            background_jobs.cancel()
+
+
+    def shutdown_background_workers(self) -> None:
+        """Cancel every pending job and stop the thread pool used by the background callbacks."""
+
+        self.cancel_background_jobs()
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+
+    def remove_callback(self, event_type: int, callback: Callable) -> None:
+        """
+        Remove a callback previously added for the specified type of event.
+
+        Parameters
+        ----------
+        event_type : int
+            Type of the event.
+        callback : Callable
+            Function to remove.
+        """
+
+        if not self.__unregister(event_type, callback):
+            raise ValueError("This callback was not added for this event type.")
+
+        if self.premade_events.get(event_type, None) == callback:
+            self.premade_events[event_type] = None
 
 
     def set_quit_callback(self, callback: Callable[[], None]):
@@ -170,15 +667,264 @@ class EventManager:
 
         Notes
         -----
-        When the event is posted, its data dictionary should at least have a 'name' field
-        containing the name of the event.
+        Each custom event gets its own event type (see get_custom_event_type),
+        and should be posted with the post method.
+        Events of type pygame.USEREVENT with a 'name' field in their data are also dispatched.
         """
 
         if event_name is None:
             raise ValueError("Event name cannot be None.")
 
         self.__check_function(callback, expected_parameters_count=1)
+
+        if len(self.custom_events) == 0:
+            self.__register(pygame.USEREVENT, self.__dispatch_custom_event, parameters_count=1, priority=0)
+
+        event_type = EventManager.get_custom_event_type(event_name)
+        if event_name in self.custom_events:
+            self.__unregister(event_type, self.custom_events[event_name])
+
         self.custom_events[event_name] = callback
+        self.__register(event_type, callback, parameters_count=1, priority=0)
+
+
+    @staticmethod
+    def get_custom_event_type(event_name: str) -> int:
+        """
+        Returns the event type of the custom event with the specified name,
+        allocating a new one with pygame.event.custom_type the first time.
+
+        Parameters
+        ----------
+        event_name : str
+            Name of the event.
+        """
+
+        event_type = EventManager.__custom_event_types.get(event_name, None)
+        if event_type is None:
+            event_type = pygame.event.custom_type()
+            EventManager.__custom_event_types[event_name] = event_type
+
+        return event_type
+
+
+    @staticmethod
+    def post(event_name: str, **data) -> None:
+        """
+        Post the custom event with the specified name.
+
+        Parameters
+        ----------
+        event_name : str
+            Name of the event.
+        **data
+            Data of the event. The 'name' field is set to the name of the event.
+        """
+
+        data['name'] = event_name
+        pygame.event.post(pygame.event.Event(EventManager.get_custom_event_type(event_name), data))
+
+
+    def __dispatch_custom_event(self, data: dict) -> None:
+        callback = self.custom_events.get(data.get('name', None), None)
+        if callback is not None:
+            callback(data)
+
+
+    def set_queue_filtering(self, enabled: bool = True) -> None:
+        """
+        Enable or disable the filtering of the event queue. When enabled, the event types without
+        any callback are blocked with pygame.event.set_allowed, so they never reach the queue.
+        The allowed types are kept in sync with the callbacks.
+
+        Parameters
+        ----------
+        enabled : bool, default = True
+            Indicates if the queue should be filtered.
+
+        Notes
+        -----
+        The filter is global to Pygame, so only one EventManager should use it at a time.
+        The events already in the queue when the filtering starts are discarded.
+        """
+
+        if self.__allowed_types is not None and not enabled and pygame.display.get_init():
+            pygame.event.set_allowed(None)
+            self.__allowed_types = None
+
+        self.__queue_filtering = enabled
+        self.__synchronize_queue_filter()
+
+
+    def set_fetch_registered_only(self, enabled: bool = True) -> None:
+        """
+        Enable or disable the fetching of the registered event types only.
+        When enabled, the events without any callback are left in the queue instead of being fetched.
+
+        Parameters
+        ----------
+        enabled : bool, default = True
+            Indicates if only the registered event types should be fetched.
+
+        Notes
+        -----
+        The events left in the queue should be consumed elsewhere, or blocked with set_queue_filtering,
+        otherwise the queue will fill up.
+        """
+
+        self.__fetch_registered_only = enabled
+
+
+    def __update_queue_filter(self) -> None:
+        self.__queue_filter_outdated = False
+        if not self.__queue_filtering:
+            return
+
+        registered_types = set(self.__registered_types)
+        if self.__allowed_types is None:
+            # set_blocked(None) blocks every event type
+            pygame.event.set_blocked(None)
+            self.__allowed_types = set()
+
+        # Only the differences are applied, as blocking a type also removes its events from the queue
+        added_types = registered_types - self.__allowed_types
+        removed_types = self.__allowed_types - registered_types
+        if len(added_types) > 0:
+            pygame.event.set_allowed(list(added_types))
+        if len(removed_types) > 0:
+            pygame.event.set_blocked(list(removed_types))
+
+        self.__allowed_types = registered_types
+
+
+    def enable_instrumentation(self, budget: Optional[float] = None,
+                               on_budget_exceeded: Optional[Callable[[float], None]] = None) -> EventInstrumentation:
+        """
+        Start recording the number of calls and the cumulated time of each callback, as well as
+        the latency of the events of each type. Returns the object holding the statistics.
+
+        Parameters
+        ----------
+        budget : float, optional
+            Maximum duration of a listen call in milliseconds.
+        on_budget_exceeded : Callable, optional
+            Function called when a listen call lasts more than the budget.
+            It should have only one parameter : the duration of the call in milliseconds.
+
+        Notes
+        -----
+        When the instrumentation is disabled (default), the dispatch is not modified at all.
+        """
+
+        self.instrumentation = EventInstrumentation(budget, on_budget_exceeded)
+        for event_type in list(self.__callbacks.keys()):
+            self.__rebuild_handlers(event_type)
+
+        return self.instrumentation
+
+
+    def disable_instrumentation(self) -> None:
+        """Stop recording the statistics of the callbacks."""
+
+        self.instrumentation = None
+        for event_type in list(self.__callbacks.keys()):
+            self.__rebuild_handlers(event_type)
+
+
+    def set_coalescing(self, event_type: int, enabled: bool = True) -> None:
+        """
+        Enable or disable the coalescing of the specified type of event. When enabled, consecutive events
+        of this type are merged and their callbacks are called only once per listen call, just before
+        the next event of another type (or at the end).
+
+        Parameters
+        ----------
+        event_type : int
+            Type of the event, for instance pygame.MOUSEMOTION.
+        enabled : bool, default = True
+            Indicates if the events should be coalesced.
+
+        Notes
+        -----
+        'MOUSEMOTION' events are merged into one with the last position and the sum of the 'rel' fields.
+        'JOYAXISMOTION' events keep the last value of each axis of each joystick.
+        Any other type only keeps the last event.
+        """
+
+        if enabled:
+            self.__coalesced_types.add(event_type)
+        else:
+            self.__coalesced_types.discard(event_type)
+
+
+    @staticmethod
+    def __coalesce(pending_events: dict, event_type: int, data: dict) -> None:
+        if event_type == pygame.MOUSEMOTION:
+            previous_data = pending_events.get(event_type, None)
+            if previous_data is not None and 'rel' in data:
+                data = dict(data)
+                previous_rel, rel = previous_data[1]['rel'], data['rel']
+                data['rel'] = (previous_rel[0] + rel[0], previous_rel[1] + rel[1])
+            pending_events[event_type] = (event_type, data)
+
+        elif event_type == pygame.JOYAXISMOTION:
+            key = (event_type, data.get('instance_id', data.get('joy', None)), data.get('axis', None))
+            pending_events[key] = (event_type, data)
+
+        else:
+            pending_events[event_type] = (event_type, data)
+
+
+    def __dispatch_pending_events(self, pending_events: dict) -> None:
+        handlers = self.__handlers
+        for event_type, data in pending_events.values():
+            for handler in handlers.get(event_type, ()):
+                handler(data)
+        pending_events.clear()
+
+
+    def start_recording(self, file_path: str) -> None:
+        """
+        Start writing every fetched event into the specified file, to be replayed later with EventReplay.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the log file. It is overwritten if it exists.
+
+        Notes
+        -----
+        Only the plain values of the events (numbers, strings, bytes, None, and tuples or lists of them)
+        are recorded, the others (such as window objects) are dropped.
+        """
+
+        self.stop_recording()
+        self.__recorder = EventRecorder(file_path)
+
+
+    def stop_recording(self) -> None:
+        """Stop the recording of the events and close the log file."""
+
+        if self.__recorder is not None:
+            self.__recorder.close()
+            self.__recorder = None
+
+
+    def set_event_source(self, event_source: Optional[EventReplay]) -> None:
+        """
+        Set the source of the events fetched by listen.
+
+        Parameters
+        ----------
+        event_source : EventReplay or None
+            Recording to replay instead of the Pygame event queue, which also works without any display.
+            None to use the Pygame event queue (default).
+        """
+
+        if event_source is not None and type(event_source) != EventReplay:
+            raise TypeError("The event source should be of type EventReplay.")
+
+        self.__event_source = event_source
 
 
     def listen(self) -> bool:
@@ -186,23 +932,107 @@ class EventManager:
         Returns True if it could fetch events, False otherwise.
         """
 
-        if not pygame.display.get_init():
+        event_source = self.__event_source
+        if event_source is not None:
+            if event_source.is_done():
+                return False
+        elif not pygame.display.get_init():
             return False
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT and self.premade_events[pygame.QUIT] is not None:
-                self.premade_events[pygame.QUIT]()
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.start_listen()
 
-            elif event.type == pygame.USEREVENT:
-                event_name = event.dict.get('name', None)
-                if event_name in self.custom_events:
-                    self.custom_events[event_name](event.dict)
-
-            elif event.type == config.MUSICENDEVENT and self.premade_events[config.MUSICENDEVENT] is not None:
-                self.premade_events[config.MUSICENDEVENT]()
+        if event_source is not None:
+            events = event_source.get_events()
+        else:
+            if self.__queue_filter_outdated:
+                self.__update_queue_filter()
 
+            if self.__fetch_registered_only:
+                events = pygame.event.get(self.__registered_types) if len(self.__registered_types) > 0 else list()
             else:
-                if event.type in self.premade_events and self.premade_events[event.type] is not None:
-                    self.premade_events[event.type](event.dict)
+                events = pygame.event.get()
+
+        if self.__recorder is not None:
+            self.__recorder.record(events)
+
+        handlers = self.__handlers
+        coalesced_types = self.__coalesced_types
+        pending_events = dict()
+
+        for event in events:
+            if event.type in coalesced_types:
+                EventManager.__coalesce(pending_events, event.type, event.dict)
+                continue
+
+            if pending_events:
+                self.__dispatch_pending_events(pending_events)
+
+            for handler in handlers.get(event.type, ()):
+                handler(event.dict)
+
+        if pending_events:
+            self.__dispatch_pending_events(pending_events)
+
+        if instrumentation is not None:
+            instrumentation.end_listen()
 
         return True
+
+
+    async def run_async(self, frame_callback: Optional[Callable[[], Any]] = None, fps: float = 60.0) -> None:
+        """
+        Run the frame loop as a coroutine : listen for events, call the frame callback,
+        then yield to the asyncio loop until the next frame. Stops when stop is called
+        or when the events cannot be fetched anymore (for instance after the window was closed).
+
+        Parameters
+        ----------
+        frame_callback : Callable, optional
+            Function called once per frame after the events, typically to update and draw the game.
+            It should not have any parameters, and can be a coroutine function.
+        fps : float, default = 60.0
+            Target number of frames per second.
+
+        Notes
+        -----
+        Callbacks which are coroutine functions are scheduled as tasks of the running loop.
+        """
+
+        if fps <= 0:
+            raise ValueError("The number of frames per second should be strictly positive.")
+
+        loop = asyncio.get_running_loop()
+        frame_duration = 1 / fps
+        next_frame_time = loop.time()
+        self.__running = True
+
+        while self.__running:
+            # The callbacks may have stopped the loop or closed the window
+            if not self.listen() or not self.__running:
+                break
+            if self.__event_source is None and not pygame.display.get_init():
+                break
+
+            if frame_callback is not None:
+                result = frame_callback()
+                if inspect.isawaitable(result):
+                    await result
+
+            next_frame_time += frame_duration
+            delay = next_frame_time - loop.time()
+            if delay < 0:
+                # Late frames are not caught up, to avoid a burst of frames
+                next_frame_time = loop.time()
+                delay = 0
+
+            await asyncio.sleep(delay)
+
+        self.__running = False
+
+
+    def stop(self) -> None:
+        """Stop the loop started with run_async at the end of the current frame."""
+
+        self.__running = False
@@ -1,13 +1,173 @@
-from typing import List, Union
+import concurrent.futures
+import hashlib
+import json
+import mmap
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Sequence, Union
 
 import pygame
 
 
+class ImageCache:
+    """
+    A class to keep the images loaded from disk within a memory budget,
+    evicting the least recently used ones when it is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize an empty cache.
+
+        Parameters
+        ----------
+        max_bytes : int, default = 256 MiB
+            Maximum number of bytes of pixel data kept in the cache.
+            Pinned images are never evicted, so they can exceed this budget.
+        """
+
+        if max_bytes <= 0:
+            raise ValueError("The cache budget should be strictly positive.")
+
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__surfaces: OrderedDict[tuple[str, bool], pygame.Surface] = OrderedDict()
+        self.__pinned: set[tuple[str, bool]] = set()
+
+    @staticmethod
+    def __get_key(file_path: str, alpha: bool) -> tuple[str, bool]:
+        return os.path.normpath(file_path), alpha
+
+    @staticmethod
+    def get_surface_size(surface: pygame.Surface) -> int:
+        """Returns the number of bytes used by the pixels of the surface."""
+
+        return surface.get_pitch() * surface.get_height()
+
+    def __contains__(self, key: tuple[str, bool]) -> bool:
+        return ImageCache.__get_key(*key) in self.__surfaces
+
+    def __len__(self) -> int:
+        return len(self.__surfaces)
+
+    def get(self, file_path: str, alpha: bool = True) -> Optional[pygame.Surface]:
+        """
+        Returns the cached image, or None if it is not in the cache.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the image file.
+        alpha : bool, default = True
+            Indicates if the image was converted with an alpha channel.
+        """
+
+        key = ImageCache.__get_key(file_path, alpha)
+        surface = self.__surfaces.get(key, None)
+
+        if surface is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.__surfaces.move_to_end(key)
+        return surface
+
+    def put(self, file_path: str, alpha: bool, surface: pygame.Surface) -> None:
+        """
+        Add an image to the cache, evicting the least recently used ones if needed.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the image file.
+        alpha : bool
+            Indicates if the image was converted with an alpha channel.
+        surface : pygame.Surface
+            Converted image.
+        """
+
+        key = ImageCache.__get_key(file_path, alpha)
+        if key in self.__surfaces:
+            self.used_bytes -= ImageCache.get_surface_size(self.__surfaces.pop(key))
+
+        self.__surfaces[key] = surface
+        self.used_bytes += ImageCache.get_surface_size(surface)
+        self.__evict()
+
+    def __evict(self) -> None:
+        if self.used_bytes <= self.max_bytes:
+            return
+
+        for key in list(self.__surfaces.keys()):
+            if key in self.__pinned:
+                continue
+
+            self.used_bytes -= ImageCache.get_surface_size(self.__surfaces.pop(key))
+            self.evictions += 1
+            if self.used_bytes <= self.max_bytes:
+                return
+
+    def pin(self, file_path: str, alpha: bool = True) -> None:
+        """
+        Prevent the specified image from ever being evicted.
+        The image does not have to be in the cache yet.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the image file.
+        alpha : bool, default = True
+            Indicates if the image is converted with an alpha channel.
+        """
+
+        self.__pinned.add(ImageCache.__get_key(file_path, alpha))
+
+    def unpin(self, file_path: str, alpha: bool = True) -> None:
+        """
+        Allow the specified image to be evicted again.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the image file.
+        alpha : bool, default = True
+            Indicates if the image is converted with an alpha channel.
+        """
+
+        self.__pinned.discard(ImageCache.__get_key(file_path, alpha))
+        self.__evict()
+
+    def clear(self) -> None:
+        """Remove every image which is not pinned from the cache."""
+
+        for key in list(self.__surfaces.keys()):
+            if key not in self.__pinned:
+                self.used_bytes -= ImageCache.get_surface_size(self.__surfaces.pop(key))
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns the hits, misses, evictions, image count and used bytes of the cache."""
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'images': len(self.__surfaces),
+            'used_bytes': self.used_bytes
+        }
+
+
 class Image:
     """
     A class to ease the use of Pygame's surfaces as images.
     """
 
+    cache: ImageCache = None
+
     @staticmethod
     def __create_surface_from_path(file_path: str) -> pygame.Surface:
         try:
@@ -23,6 +183,43 @@ class Image:
         if not pygame.display.get_active():
             raise pygame.error("pygame.display.set_mode() has not already been called.")
 
+    @staticmethod
+    def set_cache(cache: Optional[ImageCache]) -> None:
+        """
+        Set the cache used by Image.create and Image.create_no_alpha.
+
+        Parameters
+        ----------
+        cache : ImageCache or None
+            Cache to use, or None to always load the images from disk (default).
+
+        Notes
+        -----
+        Cached images are shared between every caller, so they should not be drawn on.
+        """
+
+        if cache is not None and type(cache) != ImageCache:
+            raise TypeError("The cache should be of type ImageCache.")
+
+        Image.cache = cache
+
+    @staticmethod
+    def __create(file_path: str, alpha: bool) -> pygame.Surface:
+        Image.__check_mode_and_display()
+
+        if Image.cache is not None:
+            surface = Image.cache.get(file_path, alpha)
+            if surface is not None:
+                return surface
+
+        surface = Image.__create_surface_from_path(file_path)
+        surface = surface.convert_alpha() if alpha else surface.convert()
+
+        if Image.cache is not None:
+            Image.cache.put(file_path, alpha, surface)
+
+        return surface
+
     @staticmethod
     def create(file_path: str) -> pygame.Surface:
         """
@@ -34,9 +231,7 @@ class Image:
             Path of the image file.
         """
 
-        Image.__check_mode_and_display()
-
-        return Image.__create_surface_from_path(file_path).convert_alpha()
+        return Image.__create(file_path, alpha=True)
 
     @staticmethod
     def create_no_alpha(file_path: str) -> pygame.Surface:
@@ -49,9 +244,360 @@ class Image:
             Path of the image file.
         """
 
+        return Image.__create(file_path, alpha=False)
+
+    @staticmethod
+    def preload(
+        items: Sequence[Union[str, tuple]],
+        alpha: bool = True,
+        max_workers: Optional[int] = None
+    ) -> 'ImagePreloader':
+        """
+        Start decoding the specified images on background threads, and return a handle
+        whose update method should be called every frame to finish loading them.
+
+        Parameters
+        ----------
+        items : sequence of str or tuple
+            Either paths of image files, or sprite sheet specifications as tuples
+            (path, slicing_function, *arguments), for instance ('walk.png', Sprite.slice_by_columns, 8).
+        alpha : bool, default = True
+            Indicates if the images should be converted with an alpha channel.
+        max_workers : int, optional
+            Maximum number of decoding threads (default of ThreadPoolExecutor if not specified).
+        """
+
         Image.__check_mode_and_display()
 
-        return Image.__create_surface_from_path(file_path).convert()
+        return ImagePreloader(items, alpha, Image.__create_surface_from_path, max_workers)
+
+
+class ImagePreloader:
+    """
+    A class tracking the background loading of images started with Image.preload.
+    The decoding happens on worker threads, while the conversion to the display format
+    (and the slicing of sprite sheets) is done on the main thread by the update method.
+    The items which could not be loaded (missing or corrupted file, failing slicing function)
+    do not stop the others : their exception is stored in the errors dictionary instead.
+    """
+
+    def __init__(
+        self,
+        items: Sequence[Union[str, tuple]],
+        alpha: bool,
+        load_function: Callable[[str], pygame.Surface],
+        max_workers: Optional[int] = None
+    ):
+        self.alpha = alpha
+        self.items = list(dict.fromkeys(items))
+        self.results: dict[Any, Union[pygame.Surface, List[pygame.Surface]]] = dict()
+        self.errors: dict[Any, Exception] = dict()
+        self.futures: dict[str, concurrent.futures.Future] = dict()
+        self.__pending: list[Union[str, tuple]] = list(self.items)
+        self.__converted: dict[str, pygame.Surface] = dict()
+        self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+        for item in self.items:
+            file_path = ImagePreloader.__get_path(item)
+            if file_path in self.futures:
+                continue
+
+            cached_surface = Image.cache.get(file_path, alpha) if Image.cache is not None else None
+            if cached_surface is not None:
+                self.futures[file_path] = concurrent.futures.Future()
+                self.futures[file_path].set_result(cached_surface)
+                self.__converted[file_path] = cached_surface
+            else:
+                self.futures[file_path] = self.__executor.submit(load_function, file_path)
+
+    @staticmethod
+    def __get_path(item: Union[str, tuple]) -> str:
+        if type(item) == str:
+            return item
+        elif type(item) == tuple and len(item) >= 2 and type(item[0]) == str and callable(item[1]):
+            return item[0]
+        else:
+            raise TypeError("Items should be paths or tuples (path, slicing_function, *arguments).")
+
+    def __convert(self, file_path: str) -> pygame.Surface:
+        if file_path in self.__converted:
+            return self.__converted[file_path]
+
+        surface = self.futures[file_path].result()
+        surface = surface.convert_alpha() if self.alpha else surface.convert()
+        if Image.cache is not None:
+            Image.cache.put(file_path, self.alpha, surface)
+
+        self.__converted[file_path] = surface
+        return surface
+
+    def update(self, time_budget: float = 4.0) -> bool:
+        """
+        Convert the images which have finished decoding, until the time budget is spent.
+        Should be called on the main thread, typically once per frame.
+        Returns True when every image has been loaded or has failed to load.
+
+        Parameters
+        ----------
+        time_budget : float, default = 4.0
+            Time in milliseconds that can be spent converting images. At least one image
+            is converted per call if one is ready.
+        """
+
+        start_time = time.perf_counter()
+        deadline = start_time + time_budget / 1000
+
+        while len(self.__pending) > 0:
+            item = self.__pending[0]
+            file_path = ImagePreloader.__get_path(item)
+            if not self.futures[file_path].done():
+                break
+
+            try:
+                surface = self.__convert(file_path)
+                if type(item) == str:
+                    self.results[item] = surface
+                else:
+                    self.results[item] = item[1](surface, *item[2:])
+            except Exception as error:
+                self.errors[item] = error
+            self.__pending.pop(0)
+
+            if time.perf_counter() >= deadline:
+                break
+
+        if len(self.__pending) == 0:
+            self.__executor.shutdown(wait=False)
+            return True
+
+        return False
+
+    def wait(self) -> None:
+        """Block until every image has been loaded."""
+
+        concurrent.futures.wait(self.futures.values())
+        self.update(time_budget=float('inf'))
+
+    def cancel(self) -> None:
+        """Cancel the loading of the images which have not started decoding yet."""
+
+        for future in self.futures.values():
+            future.cancel()
+
+        self.__pending.clear()
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def is_done(self) -> bool:
+        """Returns True when every image has been loaded or has failed to load."""
+
+        return len(self.__pending) == 0
+
+    def get_progress(self) -> float:
+        """Returns the proportion of loaded (or failed) images, between 0.0 and 1.0 inclusive."""
+
+        if len(self.items) == 0:
+            return 1.0
+
+        return (len(self.results) + len(self.errors)) / len(self.items)
+
+    def get(self, item: Union[str, tuple]) -> Union[pygame.Surface, List[pygame.Surface]]:
+        """
+        Returns the loaded image, or the list of sprites for a sprite sheet specification.
+        If the item failed to load, its exception is raised again.
+
+        Parameters
+        ----------
+        item : str or tuple
+            Item as it was passed to Image.preload.
+        """
+
+        if item in self.errors:
+            raise self.errors[item]
+
+        if item not in self.results:
+            raise IndexError(f"This item ('{item}') has not been loaded yet.")
+
+        return self.results[item]
+
+
+class DiskImageCache:
+    """
+    A class storing decoded images and the layout of their slices in a directory,
+    so that later runs can memory-map the raw pixels instead of decoding the files again.
+    """
+
+    INDEX_FILE_NAME = 'index.json'
+
+    def __init__(self, directory: str):
+        """
+        Initialize the cache in the specified directory, creating it if needed.
+
+        Parameters
+        ----------
+        directory : str
+            Path of the cache directory.
+        """
+
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.__index: dict[str, dict] = self.__read_index()
+
+    def __get_index_path(self) -> str:
+        return os.path.join(self.directory, DiskImageCache.INDEX_FILE_NAME)
+
+    def __read_index(self) -> dict[str, dict]:
+        try:
+            with open(self.__get_index_path(), 'r', encoding='utf-8') as fi:
+                return json.load(fi)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return dict()
+
+    def __write_index(self) -> None:
+        temporary_path = self.__get_index_path() + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as fo:
+            json.dump(self.__index, fo)
+        os.replace(temporary_path, self.__get_index_path())
+
+    @staticmethod
+    def __get_source(file_path: str, alpha: bool) -> str:
+        return f'{os.path.abspath(file_path)}|{alpha}'
+
+    @staticmethod
+    def __get_key(file_path: str, alpha: bool) -> str:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File path '{file_path}' does not exist or is inaccessible.")
+
+        identity = f'{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{alpha}'
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def __remove_pixels(self, key: str) -> None:
+        try:
+            os.remove(os.path.join(self.directory, key + '.bin'))
+        except OSError:
+            pass
+
+    @staticmethod
+    def __get_layout(sprites: list) -> list:
+        if type(sprites) == list:
+            return [DiskImageCache.__get_layout(sprite) for sprite in sprites]
+
+        return [*sprites.get_offset(), *sprites.get_size()]
+
+    @staticmethod
+    def __apply_layout(surface: pygame.Surface, layout: list, as_views: bool) -> list:
+        if type(layout[0]) == list:
+            return [DiskImageCache.__apply_layout(surface, sub_layout, as_views) for sub_layout in layout]
+
+        sprite = surface.subsurface(layout)
+        return sprite if as_views else sprite.copy()
+
+    def __load_entry(self, key: str) -> Optional[pygame.Surface]:
+        entry = self.__index.get(key, None)
+        if entry is None:
+            return None
+
+        try:
+            with open(os.path.join(self.directory, key + '.bin'), 'rb') as fi:
+                pixels = mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        surface = pygame.image.frombuffer(pixels, tuple(entry['size']), entry['format'])
+        return surface.convert_alpha() if entry['format'] == 'RGBA' else surface.convert()
+
+    def __store_entry(self, key: str, source: str, surface: pygame.Surface, alpha: bool) -> None:
+        # The entries of the previous versions of the file are no longer reachable
+        for stale_key in [other_key for other_key, entry in self.__index.items() if entry.get('source') == source]:
+            self.__remove_pixels(stale_key)
+            del self.__index[stale_key]
+
+        pixels_format = 'RGBA' if alpha else 'RGB'
+        pixels_path = os.path.join(self.directory, key + '.bin')
+
+        with open(pixels_path + '.tmp', 'wb') as fo:
+            fo.write(pygame.image.tobytes(surface, pixels_format))
+        os.replace(pixels_path + '.tmp', pixels_path)
+
+        self.__index[key] = {
+            'size': list(surface.get_size()),
+            'format': pixels_format,
+            'source': source,
+            'layouts': dict()
+        }
+        self.__write_index()
+
+    def load(self, file_path: str, alpha: bool = True) -> pygame.Surface:
+        """
+        Return the image at the specified path, from the cache if it has not changed since it was stored.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the image file.
+        alpha : bool, default = True
+            Indicates if the image should be converted with an alpha channel.
+        """
+
+        key = DiskImageCache.__get_key(file_path, alpha)
+        surface = self.__load_entry(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = Image.create(file_path) if alpha else Image.create_no_alpha(file_path)
+        self.__store_entry(key, DiskImageCache.__get_source(file_path, alpha), surface, alpha)
+        return surface
+
+    def load_sprites(
+        self,
+        file_path: str,
+        slicing_function: Callable[..., list],
+        *args,
+        alpha: bool = True,
+        as_views: bool = False
+    ) -> list:
+        """
+        Return the sprites sliced from the sheet at the specified path,
+        from the cache if neither the file nor the slicing parameters have changed.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the sprite sheet.
+        slicing_function : Callable
+            One of the slicing methods of the Sprite class, for instance Sprite.slice_by_columns.
+        *args
+            Arguments given to the slicing function after the sheet.
+        alpha : bool, default = True
+            Indicates if the sheet should be converted with an alpha channel.
+        as_views : bool, default = False
+            If True, the sprites are subsurfaces sharing the pixels of the sheet instead of copies.
+        """
+
+        slicing = f'{slicing_function.__qualname__}{args!r}'
+        surface = self.load(file_path, alpha)
+        layouts = self.__index[DiskImageCache.__get_key(file_path, alpha)]['layouts']
+
+        if slicing not in layouts:
+            layouts[slicing] = DiskImageCache.__get_layout(slicing_function(surface, *args, as_views=True))
+            self.__write_index()
+
+        return DiskImageCache.__apply_layout(surface, layouts[slicing], as_views)
+
+    def clear(self) -> None:
+        """Remove every stored image from the cache directory."""
+
+        for key in self.__index:
+            self.__remove_pixels(key)
+
+        self.__index = dict()
+        self.__write_index()
 
 
 class Sprite:
@@ -66,10 +612,19 @@ class Sprite:
         else:
             raise TypeError("The specified object was not a Surface or a string.")
 
+    @staticmethod
+    def __cut(sprite_sheet: pygame.Surface, area: tuple[int, int, int, int], as_views: bool) -> pygame.Surface:
+        if as_views:
+            return sprite_sheet.subsurface(area)
+
+        # The copy keeps the pixel format of the sheet, and thus its transparency
+        return sprite_sheet.subsurface(area).copy()
+
     @staticmethod
     def slice_by_columns(
         sprite_sheet: Union[str, pygame.Surface],
-        sprites_count: int
+        sprites_count: int,
+        as_views: bool = False
     ) -> List[pygame.Surface]:
         """
         slice by columns the given sprite sheet into the specified number of surfaces.
@@ -82,28 +637,22 @@ class Sprite:
             or the sheet directly as a surface.
         sprites_count : int
             Number of sprites to slice.
+        as_views : bool, default = False
+            If True, the sprites are subsurfaces sharing the pixels (and the alpha channel)
+            of the sheet instead of copies. Drawing on them modifies the sheet.
         """
 
         sprite_sheet = Sprite.__get_surface(sprite_sheet)
         width, height = sprite_sheet.get_size()
         width = width // sprites_count
 
-        sprites = list()
-        for i in range(sprites_count):
-            sprite = pygame.Surface((width, height))
-            sprite.blit(
-                source=sprite_sheet,
-                dest=(0, 0),
-                area=(i * width, 0, width, height)
-            )
-            sprites.append(sprite)
-
-        return sprites
+        return [Sprite.__cut(sprite_sheet, (i * width, 0, width, height), as_views) for i in range(sprites_count)]
 
     @staticmethod
     def slice_by_rows(
         sprite_sheet: Union[str, pygame.Surface],
-        sprites_count: int
+        sprites_count: int,
+        as_views: bool = False
     ) -> List[pygame.Surface]:
         """
         slice by rows the given sprite sheet into the specified number of surfaces.
@@ -122,62 +671,89 @@ class Sprite:
             or the sheet directly as a surface.
         sprites_count : int
             Number of sprites to slice.
+        as_views : bool, default = False
+            If True, the sprites are subsurfaces sharing the pixels (and the alpha channel)
+            of the sheet instead of copies. Drawing on them modifies the sheet.
         """
 
         sprite_sheet = Sprite.__get_surface(sprite_sheet)
         width, height = sprite_sheet.get_size()
         height = height // sprites_count
 
-        sprites = list()
-        for i in range(sprites_count):
-            sprite = pygame.Surface((width, height))
-            sprite.blit(
-                source=sprite_sheet,
-                dest=(0, 0),
-                area=(0, i * height, width, height)
-            )
-            sprites.append(sprite)
-
-        return sprites
+        return [Sprite.__cut(sprite_sheet, (0, i * height, width, height), as_views) for i in range(sprites_count)]
 
     @staticmethod
-    def __slice_vertically_then_horizontally(
+    def slice_grid(
         sprite_sheet: Union[str, pygame.Surface],
-        sprites_count_width: int,
-        sprites_count_height: int
+        columns_count: int,
+        rows_count: int,
+        margin: int = 0,
+        spacing: int = 0,
+        trim: bool = False,
+        by_rows_first: bool = True,
+        as_views: bool = False
     ) -> List[List[pygame.Surface]]:
-        """"""
+        """
+        slice the given sprite sheet into a grid of surfaces, cutting each cell directly from the sheet.
 
-        sprites_rows = Sprite.slice_vertically(sprite_sheet, sprites_count_width)
+        Parameters
+        ----------
+        sprite_sheet : str or pygame.Surface
+            Either a string containing the path to the sheet,
+            or the sheet directly as a surface.
+        columns_count : int
+            Number of sprites in each row.
+        rows_count : int
+            Number of sprites in each column.
+        margin : int, default = 0
+            Number of pixels around the grid.
+        spacing : int, default = 0
+            Number of pixels between two adjacent cells.
+        trim : bool, default = False
+            If True, each sprite is cropped to the smallest area containing its non-transparent pixels.
+        by_rows_first : bool, default = True
+            Indicates if the result is a list of rows (True) or a list of columns (False).
+            Example :
+            ABCD
+            EFGH
+            IJKL
 
-        sprites = list()
-        for row in sprites_rows:
-            sprites.append(Sprite.slice_horizontally(row, sprites_count_height))
+            becomes [[A, B, C, D], [E, F, G, H], [I, J, K, L]] if by_rows_first is True
+            and [[A, E, I], [B, F, J], [C, G, K], [D, H, L]] if by_rows_first is False.
+        as_views : bool, default = False
+            If True, the sprites are subsurfaces sharing the pixels of the sheet instead of copies.
+        """
 
-        return sprites
+        if columns_count <= 0 or rows_count <= 0:
+            raise ValueError("The number of columns and rows should be strictly positive.")
 
-    @staticmethod
-    def __slice_horizontally_then_vertically(
-        sprite_sheet: Union[str, pygame.Surface],
-        sprites_count_width: int,
-        sprites_count_height: int
-    ) -> List[List[pygame.Surface]]:
-        """"""
+        sprite_sheet = Sprite.__get_surface(sprite_sheet)
+        sheet_width, sheet_height = sprite_sheet.get_size()
+        width = (sheet_width - 2 * margin - (columns_count - 1) * spacing) // columns_count
+        height = (sheet_height - 2 * margin - (rows_count - 1) * spacing) // rows_count
 
-        sprites_rows = Sprite.slice_horizontally(sprite_sheet, sprites_count_width)
+        if width <= 0 or height <= 0:
+            raise ValueError("The margin and spacing leave no room for the sprites.")
 
-        sprites = list()
-        for row in sprites_rows:
-            sprites.append(Sprite.slice_vertically(row, sprites_count_height))
+        def cut(column: int, row: int) -> pygame.Surface:
+            area = pygame.Rect(margin + column * (width + spacing), margin + row * (height + spacing), width, height)
+            if trim:
+                bounding_rect = sprite_sheet.subsurface(area).get_bounding_rect()
+                area = bounding_rect.move(area.left, area.top)
+            return Sprite.__cut(sprite_sheet, tuple(area), as_views)
 
-        return sprites
+        if by_rows_first:
+            return [[cut(column, row) for column in range(columns_count)] for row in range(rows_count)]
+        else:
+            return [[cut(column, row) for row in range(rows_count)] for column in range(columns_count)]
 
     @staticmethod
     def slice_both_ways(
         sprite_sheet: Union[str, pygame.Surface],
         sprites_count_width: int,
         sprites_count_height: int,
-        by_rows_first: bool = True
+        by_rows_first: bool = True,
+        as_views: bool = False
     ) -> List[List[pygame.Surface]]:
         """
         slice by rows and by columns the given sprite sheet into the specified number of surfaces.
@@ -202,9 +778,160 @@ class Sprite:
 
             becomes [[A, B, C, D], [E, F, G, H], [I, J, K, L]] if by_rows_first is True
             and [[A, E, I], [B, F, J], [C, G, K], [D, H, L]] if by_rows_first is False.
+        as_views : bool, default = False
+            If True, the sprites are subsurfaces sharing the pixels of the sheet instead of copies.
         """
 
-        if by_rows_first:
-            return Sprite.__slice_vertically_then_horizontally(sprite_sheet, sprites_count_width, sprites_count_height)
-        else:
-            return Sprite.__slice_horizontally_then_vertically(sprite_sheet, sprites_count_width, sprites_count_height)
+        return Sprite.slice_grid(
+            sprite_sheet,
+            sprites_count_width,
+            sprites_count_height,
+            by_rows_first=by_rows_first,
+            as_views=as_views
+        )
+
+
+class AtlasRegion:
+    """A lightweight handle on an image packed into a TextureAtlas page."""
+
+    __slots__ = ('page', 'rect', '__weakref__')
+
+    def __init__(self, page: pygame.Surface, rect: pygame.Rect):
+        self.page = page
+        self.rect = rect
+
+    def get_size(self) -> tuple[int, int]:
+        """Returns the size of the image."""
+
+        return self.rect.size
+
+    def to_surface(self) -> pygame.Surface:
+        """Returns a subsurface of the atlas page containing the image (no pixel is copied)."""
+
+        return self.page.subsurface(self.rect)
+
+    def blit(self, target: pygame.Surface, position: tuple[float, float]) -> pygame.Rect:
+        """
+        Draw the image on the target surface.
+
+        Parameters
+        ----------
+        target : pygame.Surface
+            Surface to draw on.
+        position : tuple of float
+            Position of the top left corner of the image on the target.
+        """
+
+        return target.blit(self.page, position, self.rect)
+
+    def __repr__(self):
+        return f'AtlasRegion{{{self.rect=}}}'
+
+
+class TextureAtlas:
+    """
+    A class packing many images into a few large surfaces (pages),
+    each image being then accessed through an AtlasRegion.
+    """
+
+    def __init__(
+        self,
+        images: Union[Sequence[str], dict[Any, Union[str, pygame.Surface]]],
+        page_size: tuple[int, int] = (2048, 2048),
+        padding: int = 1
+    ):
+        """
+        Pack the specified images into atlas pages.
+
+        Parameters
+        ----------
+        images : sequence of str or dict
+            Either paths of image files, or a dictionary associating keys to paths or surfaces.
+            Paths are loaded with Image.create, and are their own keys if a sequence is given.
+        page_size : tuple of int, default = (2048, 2048)
+            Maximum size of each page.
+        padding : int, default = 1
+            Number of transparent pixels between two images, to avoid bleeding when scaling.
+        """
+
+        if type(images) != dict:
+            images = {file_path: file_path for file_path in images}
+
+        self.page_size = page_size
+        self.padding = padding
+        self.pages: list[pygame.Surface] = list()
+        self.regions: dict[Any, AtlasRegion] = dict()
+
+        surfaces = {
+            key: Image.create(image) if type(image) == str else image
+            for key, image in images.items()
+        }
+        placements, pages_sizes = self.__pack({key: surface.get_size() for key, surface in surfaces.items()})
+
+        for page_size in pages_sizes:
+            page = pygame.Surface(page_size, pygame.SRCALPHA)
+            if pygame.display.get_init() and pygame.display.get_active():
+                page = page.convert_alpha()
+            page.fill((0, 0, 0, 0))
+            self.pages.append(page)
+
+        for key, (page_index, rect) in placements.items():
+            page = self.pages[page_index]
+            # On a fully transparent page, the max blending copies the pixels exactly
+            page.blit(surfaces[key], rect.topleft, special_flags=pygame.BLEND_RGBA_MAX)
+            self.regions[key] = AtlasRegion(page, rect)
+
+    def __pack(self, sizes: dict[Any, tuple[int, int]]) -> tuple[dict[Any, tuple[int, pygame.Rect]], list[tuple[int, int]]]:
+        # Shelf packing : the images are sorted by decreasing height and placed in rows
+        page_width, page_height = self.page_size
+        placements = dict()
+        pages_sizes = list()
+        x, y, shelf_height, used_width = 0, 0, 0, 0
+
+        for key in sorted(sizes, key=lambda key: sizes[key][1], reverse=True):
+            width, height = sizes[key]
+            if width > page_width or height > page_height:
+                raise ValueError(f"The image '{key}' is bigger than the atlas pages.")
+
+            if x + width > page_width:
+                x, y, shelf_height = 0, y + shelf_height + self.padding, 0
+
+            if y + height > page_height or len(pages_sizes) == 0:
+                if len(pages_sizes) > 0:
+                    pages_sizes[-1] = (used_width, y - self.padding)
+                pages_sizes.append(None)
+                x, y, shelf_height, used_width = 0, 0, 0, 0
+
+            placements[key] = (len(pages_sizes) - 1, pygame.Rect(x, y, width, height))
+            x += width + self.padding
+            shelf_height = max(shelf_height, height)
+            used_width = max(used_width, x - self.padding)
+
+        if len(pages_sizes) > 0:
+            pages_sizes[-1] = (used_width, y + shelf_height)
+
+        return placements, pages_sizes
+
+    def __getitem__(self, key: Any) -> AtlasRegion:
+        if key not in self.regions:
+            raise IndexError(f"This image ('{key}') is not in the atlas.")
+
+        return self.regions[key]
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.regions
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def get_region(self, key: Any) -> AtlasRegion:
+        """
+        Return the region of the specified image. Can be accessed with square brackets.
+
+        Parameters
+        ----------
+        key : Any
+            Path of the image, or its key in the dictionary given to the constructor.
+        """
+
+        return self[key]
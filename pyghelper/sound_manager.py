@@ -1,23 +1,218 @@
+import concurrent.futures
+import glob
+import io
 import os
 import random
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Union
 
 import pygame
 
 import pyghelper.config as config
 
 
+class LazySound:
+    """A sound of a lazy SoundManager, only decoded when it is needed."""
+
+    __slots__ = ('path', 'volume', 'sound', 'size')
+
+    def __init__(self, path: str, volume: float):
+        self.path = path
+        self.volume = volume
+        self.sound: pygame.mixer.Sound = None
+        self.size = 0
+
+
+class SoundLimits:
+    """The limits applied when playing the sounds of a given name (see SoundManager.set_sound_limits)."""
+
+    __slots__ = ('max_voices', 'min_interval', 'priority', 'last_play_time')
+
+    def __init__(self, max_voices: Optional[int], min_interval: int, priority: int):
+        self.max_voices = max_voices
+        self.min_interval = min_interval
+        self.priority = priority
+        self.last_play_time: float = None
+
+
+class MusicPlaylist:
+    """
+    A class playing musics one after the other (see SoundManager.play_playlist).
+    The next music is read into memory in the background and queued ahead of time,
+    so that the transitions happen without any gap nor loading on the main thread.
+    """
+
+    def __init__(self, music_paths: list[str], shuffle: bool, loop: bool, volume: float, fade_ms: int):
+        if len(music_paths) == 0:
+            raise ValueError("The playlist should contain at least one music.")
+
+        self.music_paths = list(music_paths)
+        self.shuffle = shuffle
+        self.loop = loop
+        self.volume = volume
+        self.fade_ms = fade_ms
+        self.current_index: int = None
+        self.finished = False
+
+        self.__order: list[int] = list()
+        self.__position = -1
+        self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.__next_index: Optional[int] = None
+        self.__next_data: concurrent.futures.Future = None
+        self.__queued = False
+        self.__skipping = False
+        self.__last_position = -1
+        # Pygame reads the musics from these files while they play
+        self.__current_file: io.BytesIO = None
+        self.__queued_file: io.BytesIO = None
+
+    @staticmethod
+    def __read(music_path: str) -> bytes:
+        with open(music_path, 'rb') as fi:
+            return fi.read()
+
+    def __get_name_hint(self, index: int) -> str:
+        return os.path.splitext(self.music_paths[index])[1][1:]
+
+    def __pick_next_index(self) -> Optional[int]:
+        self.__position += 1
+        if self.__position >= len(self.__order):
+            if len(self.__order) > 0 and not self.loop:
+                return None
+
+            previous_index = self.__order[-1] if len(self.__order) > 0 else None
+            self.__order = list(range(len(self.music_paths)))
+            if self.shuffle:
+                random.shuffle(self.__order)
+                # The same music is not played twice in a row between two cycles
+                if len(self.__order) > 1 and self.__order[0] == previous_index:
+                    swap_index = random.randrange(1, len(self.__order))
+                    self.__order[0], self.__order[swap_index] = self.__order[swap_index], self.__order[0]
+            self.__position = 0
+
+        return self.__order[self.__position]
+
+    def __prefetch_next(self) -> None:
+        self.__next_index = self.__pick_next_index()
+        if self.__next_index is None:
+            self.__next_data = None
+        else:
+            self.__next_data = self.__executor.submit(MusicPlaylist.__read, self.music_paths[self.__next_index])
+        self.__queued = False
+
+    def __play_next(self, fade_ms: int) -> None:
+        if self.__next_data is None:
+            self.stop()
+            return
+
+        # Only blocks if the music has not been read in the background yet
+        self.__current_file = io.BytesIO(self.__next_data.result())
+        self.current_index = self.__next_index
+        pygame.mixer.music.load(self.__current_file, self.__get_name_hint(self.current_index))
+        pygame.mixer.music.play(fade_ms=fade_ms)
+        pygame.mixer.music.set_volume(self.volume)
+        self.__last_position = 0
+        self.__prefetch_next()
+
+    def start(self) -> None:
+        """Start playing the first music."""
+
+        self.__prefetch_next()
+        self.__play_next(self.fade_ms)
+
+    def update(self) -> None:
+        """Queue the next music when it is ready, and follow the transitions. Should be called every frame."""
+
+        if self.finished:
+            return
+
+        position = pygame.mixer.music.get_pos()
+        if position == -1:
+            # The music stopped without a queued music (not read in time, or skipped)
+            self.__play_next(self.fade_ms if self.__skipping else 0)
+            self.__skipping = False
+            return
+
+        if position < self.__last_position and self.__queued:
+            # The position is reset when the queued music starts
+            self.__current_file = self.__queued_file
+            self.current_index = self.__next_index
+            self.__prefetch_next()
+        self.__last_position = position
+
+        if not self.__queued and not self.__skipping and self.__next_data is not None and self.__next_data.done():
+            self.__queued_file = io.BytesIO(self.__next_data.result())
+            pygame.mixer.music.queue(self.__queued_file, self.__get_name_hint(self.__next_index))
+            self.__queued = True
+
+    def skip(self) -> None:
+        """Go to the next music, fading the current one out if the playlist has a fade duration."""
+
+        if self.finished:
+            return
+
+        # Stopping the music also drops the queued one, which is then played by update
+        self.__skipping = True
+        self.__queued = False
+        if self.fade_ms > 0:
+            pygame.mixer.music.fadeout(self.fade_ms)
+        else:
+            pygame.mixer.music.stop()
+
+    def stop(self) -> None:
+        """Stop following the playlist (the current music is not stopped)."""
+
+        self.finished = True
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+
 class SoundManager:
     """
     A class to ease the use of the mixer module of Pygame.
     """
 
-    def __init__(self):
-        """Initialize the sound manager instance and Pygame's Mixer."""
+    def __init__(self, lazy: bool = False, max_decoded_bytes: Optional[int] = None):
+        """
+        Initialize the sound manager instance and Pygame's Mixer.
+
+        Parameters
+        ----------
+        lazy : bool, default = False
+            If True, the sounds are only decoded the first time they are played (or prefetched).
+        max_decoded_bytes : int, optional
+            In lazy mode, maximum number of bytes of decoded sounds to keep in memory.
+            The least recently played sounds which are not playing are evicted above it.
+            If not specified, the decoded sounds are never evicted.
+        """
+
+        if max_decoded_bytes is not None and max_decoded_bytes <= 0:
+            raise ValueError("The maximum number of decoded bytes should be strictly positive.")
 
         self.sounds: dict[str, list[pygame.mixer.Sound]] = dict()
         self.musics: dict[str, str] = dict()
         pygame.mixer.init()
 
+        self.lazy = lazy
+        self.lazy_sounds: dict[str, list[LazySound]] = dict()
+        self.max_decoded_bytes = max_decoded_bytes
+        self.decoded_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__decoded_sounds: OrderedDict[LazySound, None] = OrderedDict()
+
+        # Managed channels, and who plays on each of them as (sound name, priority, start time)
+        self.__channels: list[pygame.mixer.Channel] = list()
+        self.__channel_owners: list[Optional[tuple[str, int, int]]] = list()
+        self.__sound_limits: dict[str, SoundLimits] = dict()
+        self.__last_play_frames: dict[str, int] = dict()
+        self.__frame_count = 0
+        self.set_channels_count(pygame.mixer.get_num_channels())
+
+        self.playlist: MusicPlaylist = None
+
     def add_sound(self, sound_path: str, sound_name: str, volume: float = 1.0) -> None:
         """
         Add a new sound to the manager.
@@ -32,6 +227,15 @@ class SoundManager:
             Volume of the sound, between 0.0 and 1.0 inclusive.
         """
 
+        if self.lazy:
+            if not os.path.isfile(sound_path):
+                raise FileNotFoundError(f"File path '{sound_path}' does not exist or is inaccessible.")
+
+            if not sound_name in self.lazy_sounds:
+                self.lazy_sounds[sound_name] = []
+            self.lazy_sounds[sound_name].append(LazySound(sound_path, volume))
+            return
+
         sound = pygame.mixer.Sound(sound_path)
 
         sound.set_volume(volume)
@@ -40,6 +244,101 @@ class SoundManager:
         self.sounds[sound_name].append(sound)
 
 
+    def add_sounds(
+        self,
+        manifest: dict[str, list[Union[str, tuple[str, float]]]],
+        max_workers: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> None:
+        """
+        Add many sounds at once, decoding them in parallel on a thread pool.
+
+        Parameters
+        ----------
+        manifest : dict
+            Dictionary associating each sound name to a list of variants, which are either paths
+            or tuples (path, volume). The variants of a name are played randomly by play_random_sound.
+        max_workers : int, optional
+            Maximum number of decoding threads (default of ThreadPoolExecutor if not specified).
+        on_progress : Callable, optional
+            Function called each time a sound has been decoded.
+            It should have two parameters : the number of decoded sounds and the total number of sounds.
+        """
+
+        entries = list()
+        for sound_name, variants in manifest.items():
+            for variant in variants:
+                sound_path, volume = (variant, 1.0) if type(variant) == str else variant
+                entries.append((sound_name, sound_path, volume))
+
+        if self.lazy:
+            for index, (sound_name, sound_path, volume) in enumerate(entries):
+                self.add_sound(sound_path, sound_name, volume)
+                if on_progress is not None:
+                    on_progress(index + 1, len(entries))
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(pygame.mixer.Sound, sound_path) for _, sound_path, _ in entries]
+
+            if on_progress is not None:
+                for decoded_count, _ in enumerate(concurrent.futures.as_completed(futures), start=1):
+                    on_progress(decoded_count, len(entries))
+
+            # Registered in the order of the manifest, whatever the order of decoding
+            for (sound_name, _, volume), future in zip(entries, futures):
+                sound = future.result()
+                sound.set_volume(volume)
+                if not sound_name in self.sounds:
+                    self.sounds[sound_name] = []
+                self.sounds[sound_name].append(sound)
+
+
+    @staticmethod
+    def __get_name_from_path(sound_path: str) -> str:
+        # 'hit_01.wav' and 'hit_02.wav' are both variants of 'hit'
+        stem = os.path.splitext(os.path.basename(sound_path))[0]
+        return re.sub(r'[ _\-]*\d+$', '', stem) or stem
+
+
+    def add_sounds_from_directory(
+        self,
+        pattern: str,
+        volume: float = 1.0,
+        max_workers: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> dict[str, list[str]]:
+        """
+        Add every sound matching the glob pattern, decoding them in parallel on a thread pool.
+        The name of each sound is its file name without extension and trailing number,
+        so that 'hit_01.wav' and 'hit_02.wav' are both variants of 'hit'.
+        Returns the manifest which was added.
+
+        Parameters
+        ----------
+        pattern : str
+            Glob pattern of the sound files, for instance 'assets/sfx/*.wav'.
+        volume : float, default = 1.0
+            Volume of the sounds, between 0.0 and 1.0 inclusive.
+        max_workers : int, optional
+            Maximum number of decoding threads (default of ThreadPoolExecutor if not specified).
+        on_progress : Callable, optional
+            Function called each time a sound has been decoded.
+            It should have two parameters : the number of decoded sounds and the total number of sounds.
+        """
+
+        manifest = dict()
+        for sound_path in sorted(glob.glob(pattern)):
+            manifest.setdefault(SoundManager.__get_name_from_path(sound_path), list()).append(sound_path)
+
+        self.add_sounds(
+            {sound_name: [(sound_path, volume) for sound_path in paths] for sound_name, paths in manifest.items()},
+            max_workers=max_workers,
+            on_progress=on_progress
+        )
+        return manifest
+
+
     def play_random_sound(self, sound_name: str) -> None:
         """
         Play a random sound among those with the specified name.
@@ -50,13 +349,200 @@ class SoundManager:
             Name of the sound to be played. It should have been added beforehand.
         """
 
-        sound_candidates = self.sounds.get(sound_name, None)
+        if self.lazy:
+            sound_candidates = self.lazy_sounds.get(sound_name, None)
+        else:
+            sound_candidates = self.sounds.get(sound_name, None)
 
         if sound_candidates is None:
             return
 
+        channel = self.__reserve_channel(sound_name)
+        if channel is None:
+            return
+
         sound_to_play = random.choice(sound_candidates)
-        sound_to_play.play()
+        if self.lazy:
+            sound_to_play = self.__decode(sound_to_play)
+
+        channel.play(sound_to_play)
+
+
+    def set_channels_count(self, channels_count: int) -> None:
+        """
+        Set the number of mixer channels managed by the sound manager,
+        which is the maximum number of sounds playing at the same time.
+
+        Parameters
+        ----------
+        channels_count : int
+            Number of channels.
+        """
+
+        if channels_count <= 0:
+            raise ValueError("The number of channels should be strictly positive.")
+
+        pygame.mixer.set_num_channels(channels_count)
+        self.__channels = [pygame.mixer.Channel(index) for index in range(channels_count)]
+        self.__channel_owners = [None] * channels_count
+
+
+    def set_sound_limits(self, sound_name: str, max_voices: Optional[int] = None, min_interval: int = 0,
+                         priority: int = 0) -> None:
+        """
+        Set the limits applied when playing the sounds with the specified name.
+
+        Parameters
+        ----------
+        sound_name : str
+            Name of the sounds.
+        max_voices : int, optional
+            Maximum number of these sounds playing at the same time. Further plays are ignored.
+        min_interval : int, default = 0
+            Minimum time in milliseconds between two plays of these sounds.
+        priority : int, default = 0
+            When every channel is busy, a sound stops the oldest sound with the lowest priority
+            lower than its own (sounds without limits have a priority of 0).
+        """
+
+        if max_voices is not None and max_voices <= 0:
+            raise ValueError("The maximum number of voices should be strictly positive.")
+
+        self.__sound_limits[sound_name] = SoundLimits(max_voices, min_interval, priority)
+
+
+    def update(self) -> None:
+        """
+        Should be called once per frame. Once it is, several plays of the sounds with
+        the same name during one frame are collapsed into one.
+        """
+
+        self.__frame_count += 1
+
+
+    def __count_voices(self, sound_name: str) -> int:
+        return sum(
+            1
+            for channel, owner in zip(self.__channels, self.__channel_owners)
+            if owner is not None and owner[0] == sound_name and channel.get_busy()
+        )
+
+
+    def __find_channel(self, priority: int) -> Optional[int]:
+        for index, channel in enumerate(self.__channels):
+            if not channel.get_busy():
+                return index
+
+        # Every channel is busy : the oldest sound with the lowest priority is stopped, if it is lower than this one
+        stolen_index = None
+        stolen_owner = None
+        for index, owner in enumerate(self.__channel_owners):
+            owner = owner if owner is not None else ('', 0, 0)
+            if owner[1] < priority and (stolen_owner is None or owner[1:] < stolen_owner[1:]):
+                stolen_index, stolen_owner = index, owner
+
+        if stolen_index is not None:
+            self.__channels[stolen_index].stop()
+        return stolen_index
+
+
+    def __reserve_channel(self, sound_name: str) -> Optional[pygame.mixer.Channel]:
+        if self.__frame_count > 0:
+            if self.__last_play_frames.get(sound_name, None) == self.__frame_count:
+                return None
+
+        # pygame.time.get_ticks stays at 0 until pygame.init is called, which the mixer does not need
+        now = time.perf_counter() * 1000
+        priority = 0
+        limits = self.__sound_limits.get(sound_name, None)
+        if limits is not None:
+            if limits.last_play_time is not None and now - limits.last_play_time < limits.min_interval:
+                return None
+
+            if limits.max_voices is not None and self.__count_voices(sound_name) >= limits.max_voices:
+                return None
+
+            priority = limits.priority
+
+        channel_index = self.__find_channel(priority)
+        if channel_index is None:
+            return None
+
+        self.__channel_owners[channel_index] = (sound_name, priority, now)
+        self.__last_play_frames[sound_name] = self.__frame_count
+        if limits is not None:
+            limits.last_play_time = now
+
+        return self.__channels[channel_index]
+
+
+    @staticmethod
+    def __get_sound_size(sound: pygame.mixer.Sound) -> int:
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        return round(sound.get_length() * frequency) * channels * (abs(sample_format) // 8)
+
+
+    def __decode(self, lazy_sound: LazySound) -> pygame.mixer.Sound:
+        if lazy_sound.sound is not None:
+            self.hits += 1
+            self.__decoded_sounds.move_to_end(lazy_sound)
+            return lazy_sound.sound
+
+        self.misses += 1
+        lazy_sound.sound = pygame.mixer.Sound(lazy_sound.path)
+        lazy_sound.sound.set_volume(lazy_sound.volume)
+        lazy_sound.size = SoundManager.__get_sound_size(lazy_sound.sound)
+
+        self.__decoded_sounds[lazy_sound] = None
+        self.decoded_bytes += lazy_sound.size
+        self.__evict(keep=lazy_sound)
+        return lazy_sound.sound
+
+
+    def __evict(self, keep: LazySound) -> None:
+        if self.max_decoded_bytes is None or self.decoded_bytes <= self.max_decoded_bytes:
+            return
+
+        for lazy_sound in list(self.__decoded_sounds.keys()):
+            # Sounds still playing cannot be freed
+            if lazy_sound is keep or lazy_sound.sound.get_num_channels() > 0:
+                continue
+
+            del self.__decoded_sounds[lazy_sound]
+            lazy_sound.sound = None
+            self.decoded_bytes -= lazy_sound.size
+            self.evictions += 1
+            if self.decoded_bytes <= self.max_decoded_bytes:
+                return
+
+
+    def prefetch(self, sound_name: str) -> None:
+        """
+        Decode every sound with the specified name, so the next plays do not have to (lazy mode only).
+
+        Parameters
+        ----------
+        sound_name : str
+            Name of the sounds to decode. They should have been added beforehand.
+        """
+
+        if sound_name not in self.lazy_sounds:
+            raise IndexError(f"Sound '{sound_name}' does not exist.")
+
+        for lazy_sound in self.lazy_sounds[sound_name]:
+            self.__decode(lazy_sound)
+
+
+    def get_sound_stats(self) -> dict[str, int]:
+        """Returns the hits, misses, evictions and decoded bytes of the sounds (lazy mode only)."""
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'decoded_sounds': len(self.__decoded_sounds),
+            'decoded_bytes': self.decoded_bytes
+        }
 
 
     def add_music(self, music_path: str, music_name: str) -> None:
@@ -74,7 +560,14 @@ class SoundManager:
         self.musics[music_name] = music_path
 
 
+    def __stop_playlist(self) -> None:
+        if self.playlist is not None:
+            self.playlist.stop()
+            self.playlist = None
+
     def __play_music(self, music_path: str, loop: bool, volume: int = 1.0):
+        self.__stop_playlist()
+
         # Pygame expects -1 to loop and 0 to play the music only once
         # So we take the negative value so when it is 'True' we send -1
         pygame.mixer.music.load(music_path)
@@ -130,9 +623,66 @@ class SoundManager:
 
         pygame.mixer.music.unpause()
 
+    def play_playlist(self, music_names: Optional[list[str]] = None, shuffle: bool = False, loop: bool = True,
+                      volume: float = 1.0, fade_ms: int = 0) -> MusicPlaylist:
+        """
+        Play the specified musics one after the other, without gap between them.
+        The update_music method should be called every frame to keep the playlist going.
+
+        Parameters
+        ----------
+        music_names : list of str, optional
+            Names of the musics to play, in order. If not specified, every music added to the manager.
+        shuffle : bool, default = False
+            Indicates if the musics should be played in a random order (shuffled again at each cycle).
+        loop : bool, default = True
+            Indicates if the playlist should start again after the last music.
+        volume : float, default = 1.0
+            Volume at which to play the musics, between 0.0 and 1.0 inclusive.
+        fade_ms : int, default = 0
+            Duration in milliseconds of the fade in of the first music, and of the fade out
+            then fade in when skipping a music with next_music.
+
+        Notes
+        -----
+        Pygame plays only one music at a time, so the musics cannot overlap : the transitions
+        are gapless, and the fades happen one after the other.
+        """
+
+        if music_names is None:
+            music_names = list(self.musics.keys())
+
+        for music_name in music_names:
+            if music_name not in self.musics:
+                raise IndexError(f"Music '{music_name}' does not exist.")
+
+        self.__stop_playlist()
+        self.playlist = MusicPlaylist([self.musics[music_name] for music_name in music_names],
+                                      shuffle, loop, volume, fade_ms)
+        self.playlist.start()
+        return self.playlist
+
+    def next_music(self):
+        """Skip to the next music of the playlist."""
+
+        if self.playlist is None:
+            raise ValueError("No playlist is playing.")
+
+        self.playlist.skip()
+
+    def update_music(self) -> None:
+        """
+        Advance the playlist, if one is playing. Should be called once per frame while playing a playlist.
+        Unlike update, it does not change how the sounds are played.
+        """
+
+        if self.playlist is not None:
+            self.playlist.update()
+
     def stop_music(self):
         """Stop the music."""
 
+        self.__stop_playlist()
         pygame.mixer.music.stop()
 
     def is_music_playing(self) -> bool:
@@ -146,7 +696,7 @@ class SoundManager:
 
         Notes
         -----
-        Uses pygame.USEREVENT+1 as type, so be aware of any conflict.
+        Uses its own type, allocated with pygame.event.custom_type (pyghelper.config.MUSICENDEVENT).
         """
 
         pygame.mixer.music.set_endevent(config.MUSICENDEVENT)
@@ -1,8 +1,21 @@
+import math
+import threading
+import weakref
+from typing import TYPE_CHECKING, Iterable, Optional, Sequence, Union
+
 import pygame
 from pygame import Rect
 
 import pyghelper.images as images
 
+if TYPE_CHECKING:
+    from pyghelper.animation_manager import AnimationManager
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class Scale:
     """Class containing the relevant information to convert from and to game space and screen space."""
@@ -16,6 +29,15 @@ class Scale:
         self.x_offset = x_offset
         self.y_offset = y_offset
 
+        # Scaled copies of the surfaces, dropped with the Scale itself (e.g. after a window resize)
+        self.__scaled_surfaces: dict[bool, weakref.WeakKeyDictionary] = {
+            False: weakref.WeakKeyDictionary(),
+            True: weakref.WeakKeyDictionary()
+        }
+        self.__scaled_surfaces_lock = threading.Lock()
+        # Float buffer reused by the batch conversions writing into integer buffers
+        self.__scratch: Optional['np.ndarray'] = None
+
     def to_screen_pos(self, game_x: float, game_y: float) -> tuple[float, float]:
         """Convert a position in game space to its counterpart in screen space."""
 
@@ -68,10 +90,320 @@ class Scale:
             screen_height / self.scale
         )
 
+    def __convert_many(self, values, columns_count: int, to_screen: bool, out: Optional['np.ndarray'],
+                       default_dtype: type) -> 'np.ndarray':
+        if np is None:
+            raise ImportError("NumPy is required to convert several positions or rects at once.")
+
+        # NumPy arrays of any numeric type are used as is, the operations below cast them to float
+        if not isinstance(values, np.ndarray):
+            values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != columns_count:
+            raise ValueError(f"The values should be of shape (N, {columns_count}).")
+
+        if out is None:
+            out = np.empty(values.shape, dtype=default_dtype)
+        elif out.shape != values.shape:
+            raise ValueError(f"The output buffer should be of shape {values.shape}.")
+
+        # Integer buffers get the same truncation as pygame.Rect
+        if out.dtype == np.float64:
+            result = out
+        else:
+            if self.__scratch is None or self.__scratch.size < values.size:
+                self.__scratch = np.empty(values.size, dtype=np.float64)
+            result = self.__scratch[:values.size].reshape(values.shape)
+        offsets = (self.x_offset, self.y_offset, 0.0, 0.0)[:columns_count]
+
+        # Same operations in the same order as the scalar methods, so the results are identical
+        if to_screen:
+            np.multiply(values, self.scale, out=result)
+            np.add(result, offsets, out=result)
+        else:
+            np.subtract(values, offsets, out=result)
+            np.divide(result, self.scale, out=result)
+
+        if result is not out:
+            out[...] = result
+        return out
+
+    def to_screen_positions(self, game_positions: Union[Sequence[tuple[float, float]], 'np.ndarray'],
+                            out: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """
+        Convert many positions in game space to their counterparts in screen space. Requires NumPy.
+
+        Parameters
+        ----------
+        game_positions : sequence of (x, y) or numpy array of shape (N, 2)
+            Positions in game space.
+        out : numpy array of shape (N, 2), optional
+            Buffer in which to write the result, to avoid allocating one.
+            If its type is an integer, the values are truncated like pygame.Rect does.
+        """
+
+        return self.__convert_many(game_positions, 2, to_screen=True, out=out, default_dtype=np.float64)
+
+    def to_screen_rects(self, game_rects: Union[Sequence[Union[Rect, tuple[float, float, float, float]]], 'np.ndarray'],
+                        out: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """
+        Convert many rects (left, top, width, height) in game space to their counterparts in screen space.
+        Requires NumPy.
+
+        Parameters
+        ----------
+        game_rects : sequence of pygame.Rect or (left, top, width, height), or numpy array of shape (N, 4)
+            Rects in game space.
+        out : numpy array of shape (N, 4), optional
+            Buffer in which to write the result, to avoid allocating one.
+            By default, the result is an integer array truncated like pygame.Rect does,
+            so that it matches the scalar method. A float buffer gives the exact values instead.
+        """
+
+        return self.__convert_many(game_rects, 4, to_screen=True, out=out, default_dtype=np.int64)
+
+    def to_game_positions(self, screen_positions: Union[Sequence[tuple[float, float]], 'np.ndarray'],
+                          out: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """
+        Convert many positions in screen space to their counterparts in game space. Requires NumPy.
+
+        Parameters
+        ----------
+        screen_positions : sequence of (x, y) or numpy array of shape (N, 2)
+            Positions in screen space.
+        out : numpy array of shape (N, 2), optional
+            Buffer in which to write the result, to avoid allocating one.
+            If its type is an integer, the values are truncated like pygame.Rect does.
+        """
+
+        return self.__convert_many(screen_positions, 2, to_screen=False, out=out, default_dtype=np.float64)
+
+    def to_game_rects(self, screen_rects: Union[Sequence[Union[Rect, tuple[float, float, float, float]]], 'np.ndarray'],
+                      out: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """
+        Convert many rects (left, top, width, height) in screen space to their counterparts in game space.
+        Requires NumPy.
+
+        Parameters
+        ----------
+        screen_rects : sequence of pygame.Rect or (left, top, width, height), or numpy array of shape (N, 4)
+            Rects in screen space.
+        out : numpy array of shape (N, 4), optional
+            Buffer in which to write the result, to avoid allocating one.
+            By default, the result is an integer array truncated like pygame.Rect does,
+            so that it matches the scalar method. A float buffer gives the exact values instead.
+        """
+
+        return self.__convert_many(screen_rects, 4, to_screen=False, out=out, default_dtype=np.int64)
+
+    def __scale_surface(self, surface: Union[pygame.Surface, 'images.AtlasRegion'], smooth: bool) -> pygame.Surface:
+        if type(surface) == images.AtlasRegion:
+            source = surface.to_surface()
+        else:
+            source = surface
+
+        width, height = source.get_size()
+        size = Rect(0, 0, width * self.scale, height * self.scale).size
+        if smooth:
+            return pygame.transform.smoothscale(source, size)
+        else:
+            return pygame.transform.scale(source, size)
+
+    def get_scaled_surface(self, surface: Union[pygame.Surface, 'images.AtlasRegion'],
+                           smooth: bool = False) -> pygame.Surface:
+        """
+        Return the surface scaled to screen space. The result is computed once and then memoized.
+
+        Parameters
+        ----------
+        surface : pygame.Surface or AtlasRegion
+            Surface in game space.
+        smooth : bool, default = False
+            Indicates if the surface should be scaled with smoothscale (True) or nearest neighbour (False).
+        """
+
+        scaled_surfaces = self.__scaled_surfaces[smooth]
+        scaled_surface = scaled_surfaces.get(surface, None)
+        if scaled_surface is not None:
+            return scaled_surface
+
+        scaled_surface = self.__scale_surface(surface, smooth)
+        with self.__scaled_surfaces_lock:
+            scaled_surfaces[surface] = scaled_surface
+        return scaled_surface
+
+    def prewarm(self, surfaces: Iterable[Union[pygame.Surface, 'images.AtlasRegion']], smooth: bool = False,
+                background: bool = True) -> Optional[threading.Thread]:
+        """
+        Compute the scaled copies of the specified surfaces ahead of time.
+        Returns the thread doing the work if it is done in the background.
+
+        Parameters
+        ----------
+        surfaces : iterable of pygame.Surface or AtlasRegion
+            Surfaces in game space.
+        smooth : bool, default = False
+            Indicates if the surfaces should be scaled with smoothscale (True) or nearest neighbour (False).
+        background : bool, default = True
+            Indicates if the scaling should be done on a background thread.
+        """
+
+        surfaces = list(surfaces)
+        if not background:
+            for surface in surfaces:
+                self.get_scaled_surface(surface, smooth)
+            return None
+
+        thread = threading.Thread(target=self.prewarm, args=(surfaces, smooth, False), daemon=True)
+        thread.start()
+        return thread
+
+    def prewarm_animations(self, animation_manager: 'AnimationManager', smooth: bool = False,
+                           background: bool = True) -> Optional[threading.Thread]:
+        """
+        Compute the scaled copies of every sprite of the animations of the manager ahead of time.
+        Returns the thread doing the work if it is done in the background.
+
+        Parameters
+        ----------
+        animation_manager : AnimationManager
+            Manager containing the animations.
+        smooth : bool, default = False
+            Indicates if the sprites should be scaled with smoothscale (True) or nearest neighbour (False).
+        background : bool, default = True
+            Indicates if the scaling should be done on a background thread.
+        """
+
+        sprites = dict()
+        for animation in animation_manager.animations.values():
+            sprites.update((id(sprite), sprite) for sprite in animation.sprites)
+
+        return self.prewarm(sprites.values(), smooth, background)
+
     def __repr__(self):
         return f'Scale{{{self.scale=}, {self.x_offset=}, {self.y_offset=}}}'
 
 
+class DirtyRectTracker:
+    """
+    A class to keep track of the regions of the screen which changed during a frame,
+    and update only those regions of the display.
+    """
+
+    def __init__(self, scale: Optional[Scale] = None, full_update_threshold: float = 0.5):
+        """
+        Initialize the tracker with no dirty region.
+
+        Parameters
+        ----------
+        scale : Scale, optional
+            Scale used to convert the marked rects from game space to screen space.
+            If not specified, the rects are considered to be in screen space.
+        full_update_threshold : float, default = 0.5
+            Proportion of the screen above which the whole display is flipped
+            instead of being updated rect by rect.
+        """
+
+        if not 0.0 <= full_update_threshold <= 1.0:
+            raise ValueError("The full update threshold should be between 0.0 and 1.0 inclusive.")
+
+        self.scale = scale
+        self.full_update_threshold = full_update_threshold
+        self.__rects: list[Rect] = list()
+        self.__everything_dirty = False
+
+    def mark(self, game_rect: Union[Rect, tuple[float, float, float, float]]) -> None:
+        """
+        Mark a rect in game space as changed.
+
+        Parameters
+        ----------
+        game_rect : pygame.Rect or tuple (left, top, width, height)
+            Rect which changed, in game space.
+        """
+
+        left, top, width, height = game_rect
+        if self.scale is not None:
+            left, top, width, height = self.scale.to_screen_pos_size(left, top, width, height)
+        self.mark_screen_rect((left, top, width, height))
+
+    @staticmethod
+    def __get_covering_rect(left: float, top: float, width: float, height: float) -> Rect:
+        # Unlike pygame.Rect, the fractional pixels on the edges are included rather than truncated
+        x_min, x_max = sorted((left, left + width))
+        y_min, y_max = sorted((top, top + height))
+        x_min, y_min = math.floor(x_min), math.floor(y_min)
+        return Rect(x_min, y_min, math.ceil(x_max) - x_min, math.ceil(y_max) - y_min)
+
+    def mark_screen_rect(self, screen_rect: Union[Rect, tuple[float, float, float, float]]) -> None:
+        """
+        Mark a rect in screen space as changed.
+
+        Parameters
+        ----------
+        screen_rect : pygame.Rect or tuple (left, top, width, height)
+            Rect which changed, in screen space.
+        """
+
+        if self.__everything_dirty:
+            return
+
+        rect = DirtyRectTracker.__get_covering_rect(*screen_rect)
+        if rect.width == 0 or rect.height == 0:
+            return
+
+        # Rects overlapping or touching the new one are merged into it, so the list never has overlaps
+        index = rect.inflate(2, 2).collidelist(self.__rects)
+        while index != -1:
+            merged_rect = self.__rects.pop(index)
+            rect.union_ip(merged_rect)
+            index = rect.inflate(2, 2).collidelist(self.__rects)
+
+        self.__rects.append(rect)
+
+    def mark_all(self) -> None:
+        """Mark the whole screen as changed."""
+
+        self.__everything_dirty = True
+        self.__rects.clear()
+
+    def get_rects(self) -> list[Rect]:
+        """Returns the merged dirty rects, in screen space."""
+
+        return list(self.__rects)
+
+    def clear(self) -> None:
+        """Forget every dirty region."""
+
+        self.__rects.clear()
+        self.__everything_dirty = False
+
+    def update(self) -> list[Rect]:
+        """
+        Update the dirty regions of the display, or flip it entirely if they cover
+        too much of the screen, then forget them.
+        Returns the rects which were updated.
+        """
+
+        screen = pygame.display.get_surface()
+        if screen is None:
+            raise pygame.error("pygame.display.set_mode() has not already been called.")
+
+        screen_rect = screen.get_rect()
+        rects = [rect.clip(screen_rect) for rect in self.__rects]
+        everything_dirty = self.__everything_dirty
+        self.clear()
+
+        dirty_area = sum(rect.width * rect.height for rect in rects)
+        if everything_dirty or dirty_area >= self.full_update_threshold * screen_rect.width * screen_rect.height:
+            pygame.display.flip()
+            return [screen_rect]
+
+        rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+        if len(rects) > 0:
+            pygame.display.update(rects)
+        return rects
+
+
 class Window:
     """A class with static methods to wrap some Pygame ones."""
 
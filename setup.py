@@ -16,5 +16,8 @@ setuptools.setup(
 	packages=['pyghelper'],
 	install_requires=[
 		'pygame>=2.0.1'
-	]
+	],
+	extras_require={
+		'numpy': ['numpy']
+	}
 )
\ No newline at end of file
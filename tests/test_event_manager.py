@@ -0,0 +1,78 @@
+import concurrent.futures
+import os
+import threading
+import time
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from pyghelper import EventManager
+
+
+class TestBackgroundCallbacks(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        pygame.display.set_mode((10, 10))
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.release = threading.Event()
+        self.started = list()
+        self.results = list()
+        self.event_manager = EventManager()
+        self.event_manager.add_custom_event('done', lambda data: self.results.append(data['result']))
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        pygame.quit()
+
+    def __slow_job(self, data):
+        self.started.append(data['key'])
+        self.release.wait(timeout=5)
+        return data['key']
+
+    def __run_with_timeout(self, function):
+        thread = threading.Thread(target=function, daemon=True)
+        thread.start()
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive(), "The call did not return (deadlock).")
+
+    def __post_keys(self, count):
+        for key in range(count):
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+
+    def test_burst_of_events_while_a_job_is_queued(self):
+        self.event_manager.add_background_callback(pygame.KEYDOWN, self.__slow_job, 'done',
+                                                   executor=self.executor, max_pending=1)
+        self.__post_keys(3)
+
+        self.__run_with_timeout(self.event_manager.listen)
+        self.release.set()
+        deadline = time.perf_counter() + 2
+        while len(self.results) < 2 and time.perf_counter() < deadline:
+            self.event_manager.listen()
+            time.sleep(0.01)
+
+        # Only the running job and the latest event are processed
+        self.assertEqual(self.started, [0, 2])
+        self.assertEqual(self.results, [0, 2])
+
+    def test_cancel_with_a_job_queued_in_the_executor(self):
+        self.event_manager.add_background_callback(pygame.KEYDOWN, self.__slow_job, 'done',
+                                                   executor=self.executor)
+        self.event_manager.add_background_callback(pygame.KEYDOWN, lambda: 'other', 'done',
+                                                   executor=self.executor)
+        self.__post_keys(1)
+
+        self.event_manager.listen()
+        self.__run_with_timeout(self.event_manager.cancel_background_jobs)
+        self.release.set()
+        time.sleep(0.1)
+        self.event_manager.listen()
+
+        self.assertEqual(self.results, [])
+
+
+if __name__ == '__main__':
+    unittest.main()